@@ -0,0 +1,212 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin, commit_callbacks
+from posts import lookups
+from posts.models import Comment, Follow, Group, Post, PulledAuthor
+
+User = get_user_model()
+
+POSTS_COUNT = 13
+
+
+class ApiViewsTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        for number in range(POSTS_COUNT):
+            Post.objects.create(
+                author=cls.author,
+                text=f'Тестовый пост {number}',
+                group=cls.group
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.latest('pub_date', 'pk')
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {number}'
+            )
+
+        cls.POSTS_URL = reverse('api:posts')
+        cls.GROUP_POSTS_URL = reverse(
+            'api:group_posts', kwargs={'slug': cls.group.slug}
+        )
+        cls.USER_POSTS_URL = reverse(
+            'api:user_posts', kwargs={'username': cls.author.username}
+        )
+        cls.FOLLOW_POSTS_URL = reverse('api:follow_posts')
+        cls.POST_DETAIL_URL = reverse(
+            'api:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+        cls.COMMENTS_URL = reverse(
+            'api:comments', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(ApiViewsTests.reader)
+
+    def collect(self, url, **params):
+        """Проходит все страницы списка и возвращает записи."""
+        results = []
+        response = self.client.get(url, params).json()
+        while True:
+            results.extend(response['results'])
+            if response['next'] is None:
+                return results
+            response = self.client.get(response['next']).json()
+
+    def test_feeds_return_all_posts(self):
+        """Курсор проходит все записи лент без повторов."""
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-pk'
+        ).values_list('pk', flat=True))
+        for url in (
+            ApiViewsTests.POSTS_URL,
+            ApiViewsTests.GROUP_POSTS_URL,
+            ApiViewsTests.USER_POSTS_URL,
+            ApiViewsTests.FOLLOW_POSTS_URL,
+        ):
+            with self.subTest(url=url):
+                results = self.collect(url, limit=5)
+                self.assertEqual([post['id'] for post in results], expected)
+
+    def test_follow_feed_reads_pulled_authors(self):
+        """Записи авторов без разноса попадают в ленту подписок."""
+        PulledAuthor.objects.create(author=ApiViewsTests.author)
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-pk'
+        ).values_list('pk', flat=True))
+        results = self.collect(ApiViewsTests.FOLLOW_POSTS_URL, limit=4)
+        self.assertEqual([post['id'] for post in results], expected)
+
+    def test_post_fields(self):
+        """Запись отдаётся со всеми полями."""
+        post = ApiViewsTests.post
+        response = self.client.get(ApiViewsTests.POST_DETAIL_URL)
+        self.assertEqual(response.json(), {
+            'id': post.pk,
+            'text': post.text,
+            'pub_date': response.json()['pub_date'],
+            'author': 'testAuthor',
+            'group': 'test',
+            'image': None,
+            'thumbnail': None,
+            'comments_count': 3,
+        })
+
+    def test_sparse_fields(self):
+        """Параметр fields ограничивает набор полей."""
+        response = self.client.get(
+            ApiViewsTests.POSTS_URL, {'fields': 'id,author'}
+        )
+        for post in response.json()['results']:
+            self.assertEqual(set(post), {'id', 'author'})
+
+    def test_comments(self):
+        """Комментарии отдаются новыми первыми."""
+        results = self.collect(ApiViewsTests.COMMENTS_URL, limit=2)
+        self.assertEqual(
+            [comment['text'] for comment in results],
+            ['Комментарий 2', 'Комментарий 1', 'Комментарий 0']
+        )
+
+    def test_errors(self):
+        """Ошибки отдаются в JSON с подходящим кодом."""
+        cases = (
+            (ApiViewsTests.POSTS_URL, {'fields': 'secret'},
+             HTTPStatus.BAD_REQUEST),
+            (ApiViewsTests.POSTS_URL, {'limit': 0}, HTTPStatus.BAD_REQUEST),
+            (reverse('api:group_posts', kwargs={'slug': 'missing'}), {},
+             HTTPStatus.NOT_FOUND),
+            (reverse('api:post_detail', kwargs={'post_id': 0}), {},
+             HTTPStatus.NOT_FOUND),
+        )
+        for url, params, status in cases:
+            with self.subTest(url=url, params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
+
+    def test_follow_requires_login(self):
+        """Лента подписок недоступна гостю."""
+        response = Client().get(ApiViewsTests.FOLLOW_POSTS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_read_only(self):
+        """API принимает только GET."""
+        response = self.client.post(ApiViewsTests.POSTS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304."""
+        etag = self.client.get(ApiViewsTests.POSTS_URL)['ETag']
+        response = self.client.get(
+            ApiViewsTests.POSTS_URL, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_new_comment_changes_list_etags(self):
+        """Новый комментарий меняет ETag списков с comments_count."""
+        urls = (
+            ApiViewsTests.POSTS_URL,
+            ApiViewsTests.GROUP_POSTS_URL,
+            ApiViewsTests.USER_POSTS_URL,
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        with commit_callbacks():
+            Comment.objects.create(
+                post=ApiViewsTests.post,
+                author=ApiViewsTests.reader,
+                text='Ещё'
+            )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(
+                    response.json()['results'][0]['comments_count'], 4
+                )
+
+    def test_post_detail_etag(self):
+        """ETag записи строится без объектов моделей и меняется
+        после правки записи."""
+        url = ApiViewsTests.POST_DETAIL_URL
+        with mock.patch.object(lookups, 'post') as post_lookup:
+            etag = self.client.get(url)['ETag']
+        post_lookup.assert_not_called()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        post = Post.objects.get(pk=ApiViewsTests.post.pk)
+        post.text = 'Исправленная запись'
+        with commit_callbacks():
+            post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()['text'], 'Исправленная запись')
+
+    def test_within_budget(self):
+        """Ответы API укладываются в бюджет запросов."""
+        for url in (
+            ApiViewsTests.POSTS_URL,
+            ApiViewsTests.GROUP_POSTS_URL,
+            ApiViewsTests.USER_POSTS_URL,
+            ApiViewsTests.FOLLOW_POSTS_URL,
+            ApiViewsTests.POST_DETAIL_URL,
+            ApiViewsTests.COMMENTS_URL,
+        ):
+            with self.subTest(url=url):
+                self.get_within_budget(self.client, url)
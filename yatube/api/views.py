@@ -0,0 +1,249 @@
+"""JSON API только для чтения.
+
+Строки выбираются через values() и сериализуются без создания
+объектов моделей и отрисовки шаблонов. Списки листаются курсором
+(параметр cursor), размер страницы задаёт limit, набор полей — fields.
+"""
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views.decorators.http import etag, require_GET
+
+from posts import caching, lookups
+from posts.etags import (group_etag, index_etag, make_etag, post_etag,
+                         profile_etag)
+from posts.feed import FeedPaginator
+from posts.models import Comment, Post
+from posts.paginators import CursorPaginator
+
+POST_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'thumbnail': 'thumbnail',
+    'comments_count': 'comments_count',
+}
+POST_KEY = ('pk', 'pub_date')
+
+COMMENT_FIELDS = {
+    'id': 'pk',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+COMMENT_KEY = ('pk', 'created')
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def respond(data, status=HTTPStatus.OK):
+    return JsonResponse(
+        data,
+        status=status,
+        encoder=DjangoJSONEncoder,
+        json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False}
+    )
+
+
+def api_view(view):
+    """Разрешает только GET и превращает ApiError в ответ с ошибкой."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return respond({'detail': error.detail}, error.status)
+    return wrapper
+
+
+def selected_fields(request, fields):
+    """Возвращает поля из параметра fields или все поля."""
+    names = request.GET.get('fields')
+    if not names:
+        return list(fields)
+    names = [name.strip() for name in names.split(',') if name.strip()]
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise ApiError(
+            HTTPStatus.BAD_REQUEST, f'Неизвестные поля: {", ".join(unknown)}'
+        )
+    return names
+
+
+def page_size(request):
+    limit = request.GET.get('limit', settings.POSTS_PER_PAGE)
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'limit должен быть числом')
+    if not 1 <= limit <= settings.API_MAX_LIMIT:
+        raise ApiError(
+            HTTPStatus.BAD_REQUEST,
+            f'limit должен быть от 1 до {settings.API_MAX_LIMIT}'
+        )
+    return limit
+
+
+def values(queryset, names, fields, key):
+    """Выбирает из queryset только нужные поля и поля ключа."""
+    lookups = {fields[name] for name in names} | set(key)
+    return queryset.values(*lookups)
+
+
+def serialize(row, names, fields):
+    """Переименовывает поля строки values() в поля API."""
+    data = {name: row[fields[name]] for name in names}
+    if data.get('image'):
+        data['image'] = default_storage.url(data['image'])
+    for name in ('image', 'thumbnail'):
+        if name in data and not data[name]:
+            data[name] = None
+    return data
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def respond_page(request, page, names, fields):
+    return respond({
+        'results': [serialize(row, names, fields) for row in page],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    })
+
+
+def post_list(request, queryset):
+    names = selected_fields(request, POST_FIELDS)
+    page = CursorPaginator(
+        values(queryset, names, POST_FIELDS, POST_KEY), page_size(request)
+    ).get_page(request.GET.get('cursor'))
+    return respond_page(request, page, names, POST_FIELDS)
+
+
+def list_etag(validator):
+    """Валидатор списка записей API по валидатору HTML-страницы.
+
+    В JSON, в отличие от страницы, есть comments_count, поэтому
+    в ETag добавляется версия комментариев.
+    """
+    @wraps(validator)
+    def wrapper(request, *args, **kwargs):
+        tag = validator(request, *args, **kwargs)
+        if tag is None:
+            return None
+        return make_etag(request, tag, caching.version(caching.COMMENTS))
+    return wrapper
+
+
+def detail_etag(request, post_id):
+    """Валидатор записи API одной выборкой values_list.
+
+    В отличие от post_etag для страницы, не создаёт объекты записи,
+    автора и сообщества.
+    """
+    row = Post.objects.filter(pk=post_id).values_list(
+        'updated', 'author__stats__posts_count'
+    ).first()
+    if row is None:
+        return None
+    updated, posts_count = row
+    return make_etag(
+        request,
+        updated,
+        caching.version(caching.post_scope(post_id)),
+        posts_count,
+        caching.version(caching.CARDS)
+    )
+
+
+def found(obj):
+    if obj is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено')
+
+
+@api_view
+@etag(list_etag(index_etag))
+def posts(request):
+    """Лента всех записей."""
+    return post_list(request, Post.objects.all())
+
+
+@api_view
+@etag(list_etag(group_etag))
+def group_posts(request, slug):
+    """Записи сообщества."""
+    found(lookups.group(request, slug))
+    return post_list(request, Post.objects.filter(group__slug=slug))
+
+
+@api_view
+@etag(list_etag(profile_etag))
+def user_posts(request, username):
+    """Записи автора."""
+    found(lookups.author(request, username))
+    return post_list(request, Post.objects.filter(author__username=username))
+
+
+@api_view
+def follow_posts(request):
+    """Лента подписок текущего пользователя."""
+    if not request.user.is_authenticated:
+        raise ApiError(HTTPStatus.FORBIDDEN, 'Требуется авторизация')
+    names = selected_fields(request, POST_FIELDS)
+    page = FeedPaginator(
+        request.user,
+        page_size(request),
+        posts=values(Post.objects.all(), names, POST_FIELDS, POST_KEY)
+    ).get_page(request.GET.get('cursor'))
+    return respond_page(request, page, names, POST_FIELDS)
+
+
+@api_view
+@etag(detail_etag)
+def post_detail(request, post_id):
+    """Одна запись."""
+    names = selected_fields(request, POST_FIELDS)
+    row = values(
+        Post.objects.filter(pk=post_id), names, POST_FIELDS, POST_KEY
+    ).first()
+    if row is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено')
+    return respond(serialize(row, names, POST_FIELDS))
+
+
+@api_view
+@etag(post_etag)
+def comments(request, post_id):
+    """Комментарии к записи, новые первыми."""
+    found(lookups.post(request, post_id))
+    names = selected_fields(request, COMMENT_FIELDS)
+    page = CursorPaginator(
+        values(
+            Comment.objects.filter(post_id=post_id),
+            names,
+            COMMENT_FIELDS,
+            COMMENT_KEY
+        ),
+        page_size(request),
+        field='created'
+    ).get_page(request.GET.get('cursor'))
+    return respond_page(request, page, names, COMMENT_FIELDS)
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """Класс настройки раздела фоновых задач."""
+
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'available_at',
+        'created',
+    )
+    list_filter = ('status', 'name')
+    list_per_page = 50
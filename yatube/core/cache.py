@@ -0,0 +1,246 @@
+"""Двухуровневый кеш: LRU в памяти процесса перед общим кешем.
+
+Общий кеш — другой кеш из CACHES, алиас которого указан в LOCATION:
+файловый для локального запуска, Redis или Memcached в бою. Значение
+из общего кеша хранится в памяти процесса не дольше LOCAL_TIMEOUT
+секунд и не дольше собственного срока ключа, поэтому другие процессы
+видят изменения с такой задержкой. Ключи с префиксами
+SHARED_ONLY_PREFIXES (например, счётчики версий) в память не попадают
+и всегда читаются из общего кеша.
+
+get_or_set и промахи по ключам с префиксами LOCK_PREFIXES защищены
+от лавины запросов: значение вычисляет тот, кто взял блокировку
+в общем кеше, остальные до LOCK_TIMEOUT секунд ждут его результата.
+Счётчики попаданий и промахов процесса отдаёт metrics().
+"""
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+LOCK_POLL_INTERVAL = 0.05
+
+MISSING = object()
+
+
+class LocalStore:
+    """LRU-словарь процесса со сроком жизни у каждого ключа."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(value)
+
+    def set(self, key, value, expires):
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Кеши Django создаются в каждом потоке заново, а память процесса
+# должна быть общей для потоков, поэтому хранилища живут в модуле.
+stores = {}
+counters = {}
+stores_lock = threading.Lock()
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.shared_only = tuple(options.get('SHARED_ONLY_PREFIXES', ()))
+        self.lock_prefixes = tuple(options.get('LOCK_PREFIXES', ()))
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 5)
+        with stores_lock:
+            if location not in stores:
+                stores[location] = LocalStore(
+                    options.get('LOCAL_MAX_ENTRIES', 1000)
+                )
+                counters[location] = Counter()
+        self.local = stores[location]
+        self.counters = counters[location]
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def metrics(self):
+        """Попадания в память, в общий кеш, промахи и ожидания."""
+        return dict(self.counters)
+
+    def resolve_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def remember(self, key, value, version, timeout=None):
+        if key.startswith(self.shared_only):
+            return
+        seconds = self.local_timeout
+        if timeout is not None:
+            seconds = min(seconds, timeout)
+        if seconds > 0:
+            self.local.set(
+                self.make_key(key, version),
+                value,
+                time.monotonic() + seconds
+            )
+
+    def forget(self, key, version):
+        self.local.delete(self.make_key(key, version))
+
+    def lookup(self, key, version):
+        if not key.startswith(self.shared_only):
+            value = self.local.get(self.make_key(key, version))
+            if value is not MISSING:
+                self.counters['local_hits'] += 1
+                return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            self.counters['misses'] += 1
+            return MISSING
+        self.counters['shared_hits'] += 1
+        self.remember(key, value, version)
+        return value
+
+    def lock_key(self, key):
+        return f'{key}:lock'
+
+    def wait_or_lock(self, key, version):
+        """Берёт блокировку ключа или ждёт значения от её владельца.
+
+        MISSING означает, что значение нужно вычислить самому.
+        """
+        if self.shared.add(
+            self.lock_key(key), True, self.lock_timeout, version=version
+        ):
+            return MISSING
+        self.counters['lock_waits'] += 1
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = self.shared.get(key, MISSING, version=version)
+            if value is not MISSING:
+                self.remember(key, value, version)
+                return value
+        return MISSING
+
+    def unlock(self, key, version):
+        self.shared.delete(self.lock_key(key), version=version)
+
+    def get(self, key, default=None, version=None):
+        value = self.lookup(key, version)
+        if value is MISSING and key.startswith(self.lock_prefixes):
+            value = self.wait_or_lock(key, version)
+        return default if value is MISSING else value
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.lookup(key, version)
+        if value is MISSING:
+            value = self.wait_or_lock(key, version)
+        if value is not MISSING:
+            return value
+        try:
+            if callable(default):
+                default = default()
+            if default is None:
+                return None
+            self.add(key, default, timeout, version)
+        finally:
+            self.unlock(key, version)
+        value = self.lookup(key, version)
+        return default if value is MISSING else value
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.resolve_timeout(timeout)
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.remember(key, value, version, timeout)
+        return added
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.resolve_timeout(timeout)
+        self.shared.set(key, value, timeout, version=version)
+        self.remember(key, value, version, timeout)
+        if key.startswith(self.lock_prefixes):
+            self.unlock(key, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.forget(key, version)
+        return self.shared.touch(
+            key, self.resolve_timeout(timeout), version=version
+        )
+
+    def delete(self, key, version=None):
+        self.forget(key, version)
+        self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return self.lookup(key, version) is not MISSING
+
+    def incr(self, key, delta=1, version=None):
+        self.forget(key, version)
+        return self.shared.incr(key, delta, version=version)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            value = MISSING
+            if not key.startswith(self.shared_only):
+                value = self.local.get(self.make_key(key, version))
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        self.counters['local_hits'] += len(found)
+        shared = self.shared.get_many(missing, version=version)
+        self.counters['shared_hits'] += len(shared)
+        self.counters['misses'] += len(missing) - len(shared)
+        for key, value in shared.items():
+            self.remember(key, value, version)
+        found.update(shared)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.resolve_timeout(timeout)
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self.remember(key, value, version, timeout)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.forget(key, version)
+        self.shared.delete_many(keys, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
@@ -0,0 +1,42 @@
+"""Настройка соединений с базой данных.
+
+Соединения SQLite при открытии получают PRAGMA из SQLITE_PRAGMAS.
+Постоянные соединения (CONN_MAX_AGE) в начале запроса проверяются
+не чаще раза в DB_HEALTH_CHECK_INTERVAL секунд, и разорванное
+соединение закрывается до того, как запрос им воспользуется.
+"""
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к новому соединению SQLite.
+
+    PRAGMA выполняются на соединении sqlite3 в обход курсоров Django,
+    чтобы настройка соединения не попадала в учёт запросов страницы.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def check_connection(connection, now):
+    """Закрывает открытое соединение, если оно перестало отвечать."""
+    if connection.connection is None:
+        return
+    checked_at = getattr(connection, 'health_checked_at', None)
+    if (checked_at is not None
+            and now - checked_at < settings.DB_HEALTH_CHECK_INTERVAL):
+        return
+    connection.health_checked_at = now
+    if not connection.is_usable():
+        connection.close()
+
+
+def check_connections(**kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        check_connection(connection, now)
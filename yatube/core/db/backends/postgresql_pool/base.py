@@ -0,0 +1,98 @@
+"""PostgreSQL с пулом соединений внутри процесса.
+
+Подключается как ENGINE 'core.db.backends.postgresql_pool'. Закрытое
+Django соединение возвращается в пул psycopg2 и выдаётся следующему
+запросу, поэтому установка соединения не входит во время ответа.
+Размер пула задаётся ключом POOL настроек базы:
+{'MIN_SIZE': 1, 'MAX_SIZE': 10, 'TIMEOUT': 30}. Если все MAX_SIZE
+соединений заняты, поток ждёт освобождения до TIMEOUT секунд.
+"""
+import threading
+
+import psycopg2
+from django.db.backends.postgresql.base import \
+    DatabaseWrapper as PostgresDatabaseWrapper
+from psycopg2 import pool as psycopg2_pool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class BlockingPool:
+    """Пул psycopg2, который при исчерпании ждёт свободное соединение.
+
+    ThreadedConnectionPool.getconn сразу бросает PoolError, когда выданы
+    все MAX_SIZE соединений, поэтому выдача ограничена семафором того же
+    размера.
+    """
+
+    def __init__(self, min_size, max_size, timeout, **conn_params):
+        self.pool = psycopg2_pool.ThreadedConnectionPool(
+            min_size, max_size, **conn_params
+        )
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.timeout = timeout
+
+    def getconn(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError(
+                f'Нет свободного соединения в пуле за {self.timeout} с'
+            )
+        try:
+            connection = self.pool.getconn()
+            if connection.closed:
+                self.pool.putconn(connection, close=True)
+                connection = self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+        return connection
+
+    def putconn(self, connection, close=False):
+        try:
+            self.pool.putconn(connection, close=close)
+        finally:
+            self.slots.release()
+
+
+def get_pool(alias, settings_dict, conn_params):
+    """Пул соединений базы alias, создаётся при первом обращении."""
+    with pools_lock:
+        if alias not in pools:
+            options = settings_dict.get('POOL', {})
+            pools[alias] = BlockingPool(
+                options.get('MIN_SIZE', 1),
+                options.get('MAX_SIZE', 10),
+                options.get('TIMEOUT', 30),
+                **conn_params
+            )
+        return pools[alias]
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, self.settings_dict, conn_params)
+        connection = self.pool.getconn()
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        """Возвращает соединение в пул вместо закрытия.
+
+        Соединение после ошибки базы закрывается, чтобы пул не выдал
+        его снова. Незавершённую транзакцию пул откатывает сам.
+        """
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            self.pool.putconn(
+                self.connection,
+                close=bool(self.connection.closed or self.errors_occurred)
+            )
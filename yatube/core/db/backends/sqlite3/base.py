@@ -0,0 +1,16 @@
+"""SQLite, в котором транзакции сразу берут блокировку записи.
+
+Подключается как ENGINE 'core.db.backends.sqlite3'. Django начинает
+транзакцию отложенным BEGIN, и транзакция, которая сначала читает,
+а потом пишет, при записи другого соединения сразу получает
+«database is locked», не дожидаясь освобождения базы. BEGIN IMMEDIATE
+берёт блокировку записи в начале транзакции и ждёт её до timeout
+соединения, поэтому параллельные записи выполняются по очереди.
+"""
+from django.db.backends.sqlite3.base import \
+    DatabaseWrapper as SQLiteDatabaseWrapper
+
+
+class DatabaseWrapper(SQLiteDatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
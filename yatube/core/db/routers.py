@@ -0,0 +1,97 @@
+"""Чтение с реплик базы данных.
+
+Чтение уходит на реплику из DATABASE_REPLICAS только внутри
+replica_reads, которым ReplicaRoutingMiddleware оборачивает безопасные
+запросы; всё остальное, в том числе команды и фоновые задачи, читает
+с основной базы. Запрос, который уже писал в базу или идёт внутри
+транзакции, дочитывает с основной базы. Реплика с отставанием больше
+REPLICA_MAX_LAG секунд или недоступная реплика пропускается; отставание
+каждой реплики проверяется не чаще раза в REPLICA_LAG_CHECK_INTERVAL
+секунд.
+
+Поэтому кеш, заполненный с реплики сразу после записи, может содержать
+данные старше своей версии; версионированные кеши записей сбрасываются
+повторно, когда реплики гарантированно догнали основную базу
+(posts.caching.bumped).
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+LAG_QUERIES = {
+    'postgresql': (
+        'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()'
+        ' THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM'
+        ' now() - pg_last_xact_replay_timestamp()), 0) END'
+    ),
+}
+
+state = threading.local()
+freshness = {}
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Разрешает чтение с реплик в текущем потоке до первой записи."""
+    state.enabled = enabled
+    state.wrote = False
+    try:
+        yield
+    finally:
+        state.enabled = False
+
+
+def wrote():
+    """Писал ли текущий поток в основную базу внутри replica_reads."""
+    return getattr(state, 'wrote', False)
+
+
+def replica_lag(alias):
+    """Отставание реплики в секундах; 0 для баз без репликации."""
+    connection = connections[alias]
+    query = LAG_QUERIES.get(connection.vendor)
+    if query is None:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(query)
+        return cursor.fetchone()[0]
+
+
+def is_fresh(alias, now):
+    checked_at, fresh = freshness.get(alias, (None, False))
+    if (checked_at is None
+            or now - checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL):
+        try:
+            fresh = replica_lag(alias) <= settings.REPLICA_MAX_LAG
+        except DatabaseError:
+            fresh = False
+        freshness[alias] = (now, fresh)
+    return fresh
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not getattr(state, 'enabled', False) or wrote():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        now = time.monotonic()
+        replicas = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if is_fresh(alias, now)
+        ]
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,89 @@
+import multiprocessing
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core import tasks
+
+
+def work(stop, poll_interval, once):
+    """Выполняет задачи, пока не установлен stop.
+
+    В режиме once завершается, когда очередь опустела.
+    """
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            if not tasks.run_next():
+                if once:
+                    return
+                stop.wait(poll_interval)
+    finally:
+        connections.close_all()
+
+
+def run_threads(threads, poll_interval, once):
+    """Запускает threads потоков-обработчиков и ждёт их завершения."""
+    tasks.discover()
+    stop = threading.Event()
+    workers = [
+        threading.Thread(
+            target=work,
+            args=(stop, poll_interval, once),
+            name=f'worker-{number}'
+        )
+        for number in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчик фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=1,
+            help='Количество потоков в каждом процессе.'
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Количество процессов.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        arguments = (
+            options['threads'], options['poll_interval'], options['once']
+        )
+        if options['processes'] == 1:
+            run_threads(*arguments)
+            return
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=run_threads, args=arguments)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.join()
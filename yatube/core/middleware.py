@@ -0,0 +1,78 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .db import routers
+from .queries import QueryRecorder, check, logger, stats
+
+
+class QueryBudgetMiddleware:
+    """Считает SQL-запросы каждого запроса и сверяет их с бюджетом.
+
+    Количество запросов отдаётся в заголовке X-Query-Count, превышения
+    бюджета QUERY_BUDGETS и повторяющиеся запросы пишутся в лог, а каждые
+    QUERY_STATS_LOG_EVERY запросов к представлению в лог выгружается
+    накопленная статистика. Включается настройкой QUERY_BUDGET_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        for problem in check(view_name, recorder):
+            logger.warning(problem)
+        requests = stats.add(view_name, recorder)
+        response['X-Query-Count'] = recorder.count
+        every = settings.QUERY_STATS_LOG_EVERY
+        if every and requests % every == 0:
+            logger.info('query stats %s', json.dumps(stats.export()))
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Направляет чтение безопасных запросов на реплики.
+
+    После запроса, который писал в базу, клиент получает cookie и
+    REPLICA_PIN_SECONDS секунд читает с основной базы, чтобы видеть
+    собственные изменения. Без DATABASE_REPLICAS не подключается.
+    """
+
+    cookie_name = 'primary_pin'
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def pinned(self, request):
+        try:
+            until = int(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            return False
+        return until > time.time()
+
+    def __call__(self, request):
+        safe = request.method in self.safe_methods
+        with routers.replica_reads(safe and not self.pinned(request)):
+            response = self.get_response(request)
+            wrote = routers.wrote()
+        if wrote or not safe:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                self.cookie_name,
+                int(time.time()) + seconds,
+                max_age=seconds,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
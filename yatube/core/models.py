@@ -0,0 +1,56 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Класс фоновой задачи.
+
+    Задача доступна обработчику, когда наступило available_at. Взятая
+    в работу задача откладывается на время видимости, поэтому после
+    падения обработчика её подхватит другой.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='Задача')
+    arguments = models.TextField(default='[]', verbose_name='Аргументы')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки'
+    )
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Доступна с'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('available_at',)
+        indexes = (
+            models.Index(
+                fields=['status', 'available_at'],
+                name='task_status_available'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
@@ -0,0 +1,103 @@
+"""Учёт SQL-запросов, выполненных при обработке запроса.
+
+Запросы перехватываются через connection.execute_wrapper. Текст SQL
+приходит с плейсхолдерами, поэтому одинаковый текст означает запросы
+одной формы; многократное повторение формы — признак N+1.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """Запоминает SQL и длительность всех запросов к базам."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.monotonic() - start))
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+    def repeated(self, threshold=None):
+        """Возвращает формы запросов, повторённые не меньше threshold раз."""
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        shapes = Counter(sql for sql, _ in self.queries)
+        return {sql: total for sql, total in shapes.items()
+                if total >= threshold}
+
+
+class QueryStats:
+    """Накопленная по представлениям статистика запросов процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = defaultdict(lambda: {
+            'requests': 0, 'queries': 0, 'max_queries': 0,
+            'over_budget': 0, 'repeated': 0,
+        })
+
+    def add(self, view_name, recorder):
+        """Учитывает запрос и возвращает число запросов к представлению."""
+        with self.lock:
+            view = self.views[view_name]
+            view['requests'] += 1
+            view['queries'] += recorder.count
+            view['max_queries'] = max(view['max_queries'], recorder.count)
+            view['over_budget'] += over_budget(view_name, recorder)
+            view['repeated'] += bool(recorder.repeated())
+            return view['requests']
+
+    def export(self):
+        """Возвращает копию статистики, пригодную для json.dumps."""
+        with self.lock:
+            return {name: dict(view) for name, view in self.views.items()}
+
+
+stats = QueryStats()
+
+
+def over_budget(view_name, recorder):
+    budget = settings.QUERY_BUDGETS.get(view_name)
+    return budget is not None and recorder.count > budget
+
+
+def check(view_name, recorder):
+    """Сверяет запросы с бюджетом представления и ищет N+1.
+
+    Возвращает список найденных нарушений.
+    """
+    problems = []
+    if over_budget(view_name, recorder):
+        problems.append(
+            f'{view_name}: {recorder.count} запросов при бюджете '
+            f'{settings.QUERY_BUDGETS[view_name]}'
+        )
+    for sql, total in recorder.repeated().items():
+        problems.append(f'{view_name}: запрос повторён {total} раз: {sql}')
+    return problems
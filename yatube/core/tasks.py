@@ -0,0 +1,144 @@
+"""Очередь фоновых задач в базе данных.
+
+Функция регистрируется декоратором task и ставится в очередь вызовом
+delay или, с отсрочкой в секундах, schedule; задачи выполняет команда
+manage.py runworker.
+"""
+import json
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func):
+    """Регистрирует функцию как фоновую задачу.
+
+    Аргументы задачи сохраняются в JSON, поэтому передавать следует
+    идентификаторы, а не объекты моделей.
+    """
+    name = f'{func.__module__}.{func.__name__}'
+    registry[name] = func
+
+    def delay(*args):
+        enqueue(name, *args)
+
+    def schedule(seconds, *args):
+        enqueue(name, *args, countdown=seconds)
+
+    func.delay = delay
+    func.schedule = schedule
+    return func
+
+
+def enqueue(name, *args, countdown=0):
+    """Ставит задачу в очередь после фиксации текущей транзакции.
+
+    Задача станет доступна обработчику через countdown секунд. При
+    TASKS_EAGER задача выполняется в процессе веб-сервера после фиксации:
+    сразу или, с отсрочкой, по таймеру в отдельном потоке.
+    """
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: run_eager(name, args, countdown))
+        return
+    transaction.on_commit(lambda: Task.objects.create(
+        name=name,
+        arguments=json.dumps(args),
+        available_at=timezone.now() + timedelta(seconds=countdown)
+    ))
+
+
+def run_eager(name, args, countdown):
+    if not countdown:
+        registry[name](*args)
+        return
+    timer = threading.Timer(countdown, run_in_thread, (name, args))
+    timer.daemon = True
+    timer.start()
+
+
+def run_in_thread(name, args):
+    """Выполняет отложенную задачу в потоке таймера."""
+    try:
+        registry[name](*args)
+    except Exception:
+        logger.exception('Задача %s завершилась с ошибкой', name)
+    finally:
+        connections.close_all()
+
+
+def claim():
+    """Берёт в работу одну доступную задачу.
+
+    Задача захватывается условным UPDATE, поэтому несколько
+    обработчиков не получат одну и ту же задачу. Возвращает задачу
+    или None, если очередь пуста.
+    """
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status__in=(Task.QUEUED, Task.RUNNING), available_at__lte=now
+    ).order_by('available_at').values_list('pk', 'available_at')
+    for pk, available_at in candidates[:settings.TASKS_CLAIM_BATCH]:
+        claimed = Task.objects.filter(
+            pk=pk, available_at=available_at
+        ).exclude(status=Task.FAILED).update(
+            status=Task.RUNNING,
+            available_at=now + timedelta(
+                seconds=settings.TASKS_VISIBILITY_TIMEOUT
+            )
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def execute(task):
+    """Выполняет задачу: удаляет её при успехе, иначе планирует повтор.
+
+    После TASKS_MAX_ATTEMPTS неудач задача остаётся с состоянием failed.
+    """
+    attempts = task.attempts + 1
+    try:
+        registry[task.name](*json.loads(task.arguments))
+    except Exception:
+        logger.exception('Задача %s завершилась с ошибкой', task.name)
+        failed = attempts >= settings.TASKS_MAX_ATTEMPTS
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.FAILED if failed else Task.QUEUED,
+            attempts=attempts,
+            available_at=timezone.now() + timedelta(
+                seconds=settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1)
+            ),
+            last_error=traceback.format_exc()
+        )
+        return False
+    Task.objects.filter(pk=task.pk).delete()
+    return True
+
+
+def run_next():
+    """Выполняет одну задачу из очереди.
+
+    Возвращает False, если очередь пуста.
+    """
+    task = claim()
+    if task is None:
+        return False
+    execute(task)
+    return True
+
+
+def discover():
+    """Импортирует модули tasks всех приложений для регистрации задач."""
+    autodiscover_modules('tasks')
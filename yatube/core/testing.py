@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.urls import resolve
+
+from .queries import QueryRecorder, check
+
+
+class QueryBudgetMixin:
+    """Проверки бюджета запросов для тестов на TestCase."""
+
+    def get_within_budget(self, client, url, data=None):
+        """Выполняет GET и проверяет запросы по бюджету QUERY_BUDGETS.
+
+        Тест падает при превышении бюджета и при повторяющихся запросах.
+        Возвращает ответ.
+        """
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = client.get(url, data)
+        problems = check(resolve(url).view_name, recorder)
+        self.assertFalse(problems, '\n'.join(problems))
+        return response
+
+
+@contextmanager
+def commit_callbacks():
+    """Выполняет колбэки transaction.on_commit, отложенные внутри блока.
+
+    TestCase не фиксирует транзакцию теста, поэтому без этого действия
+    после COMMIT (сброс версий кеша, разнос ленты) в тестах не происходят.
+    """
+    start = len(connection.run_on_commit)
+    yield
+    while len(connection.run_on_commit) > start:
+        callbacks = connection.run_on_commit[start:]
+        del connection.run_on_commit[start:]
+        for _, callback in callbacks:
+            callback()
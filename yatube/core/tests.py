@@ -1,10 +1,39 @@
+import json
+import os
+import threading
+import time
+from datetime import timedelta
 from http import HTTPStatus
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import DatabaseError, connection
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from . import db, tasks
+from .cache import TwoTierCache, stores
+from .db import routers
+from .middleware import ReplicaRoutingMiddleware
+from .models import Task
 
 User = get_user_model()
 
+calls = []
+
+
+@tasks.task
+def remember(value):
+    calls.append(value)
+
+
+@tasks.task
+def explode():
+    raise RuntimeError('Ошибка задачи')
+
 
 class ViewTestClass(TestCase):
     def setUp(self):
@@ -24,3 +53,268 @@ class ViewTestClass(TestCase):
     def test_aut_error_page(self):
         response = self.authorized_client.get('/nonexist-page/')
         self.assertions(response)
+
+
+class StubConnection:
+    def __init__(self, usable):
+        self.connection = object()
+        self.usable = usable
+        self.checks = 0
+
+    def is_usable(self):
+        self.checks += 1
+        return self.usable
+
+    def close(self):
+        self.connection = None
+
+
+@override_settings(TASKS_MAX_ATTEMPTS=2)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_task_is_executed_and_removed(self):
+        """Проверяем, что задача выполняется с аргументами
+        и удаляется из очереди."""
+        Task.objects.create(
+            name=f'{__name__}.remember', arguments=json.dumps([42])
+        )
+        self.assertTrue(tasks.run_next())
+        self.assertEqual(calls, [42])
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(tasks.run_next())
+
+    def test_future_task_is_not_claimed(self):
+        """Проверяем, что задача не берётся раньше available_at."""
+        Task.objects.create(
+            name=f'{__name__}.remember',
+            arguments=json.dumps([1]),
+            available_at=timezone.now() + timedelta(minutes=1)
+        )
+        self.assertFalse(tasks.run_next())
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        """Проверяем, что упавшая задача откладывается для повтора,
+        а после исчерпания попыток помечается как failed."""
+        task = Task.objects.create(name=f'{__name__}.explode')
+        tasks.run_next()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(task.attempts, 1)
+        self.assertGreater(task.available_at, timezone.now())
+        Task.objects.filter(pk=task.pk).update(available_at=timezone.now())
+        tasks.run_next()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertIn('RuntimeError', task.last_error)
+
+    def test_expired_running_task_is_reclaimed(self):
+        """Проверяем, что задача упавшего обработчика снова берётся
+        в работу после истечения времени видимости."""
+        Task.objects.create(
+            name=f'{__name__}.remember',
+            arguments=json.dumps([7]),
+            status=Task.RUNNING,
+            available_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertTrue(tasks.run_next())
+        self.assertEqual(calls, [7])
+
+
+class TaskScheduleTests(TransactionTestCase):
+    def test_scheduled_task_waits_for_countdown(self):
+        """Проверяем, что отложенная задача недоступна до истечения
+        отсрочки."""
+        remember.schedule(60, 7)
+        task = Task.objects.get()
+        self.assertEqual(json.loads(task.arguments), [7])
+        self.assertGreater(
+            task.available_at, timezone.now() + timedelta(seconds=50)
+        )
+        self.assertFalse(tasks.run_next())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_task_waits_for_countdown(self):
+        """Проверяем, что при TASKS_EAGER отложенная задача выполняется
+        по таймеру, а не сразу."""
+        calls.clear()
+        remember.schedule(0.2, 8)
+        self.assertEqual(calls, [])
+        deadline = time.monotonic() + 5
+        while not calls and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(calls, [8])
+        self.assertFalse(Task.objects.exists())
+
+
+class DatabaseConnectionTests(TestCase):
+    def test_sqlite_pragmas_are_applied(self):
+        """Проверяем, что соединение SQLite получает PRAGMA."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    @override_settings(DB_HEALTH_CHECK_INTERVAL=30)
+    def test_broken_connection_is_closed(self):
+        """Проверяем, что неотвечающее соединение закрывается,
+        а проверка повторяется не чаще заданного интервала."""
+        healthy = StubConnection(usable=True)
+        db.check_connection(healthy, now=100)
+        db.check_connection(healthy, now=110)
+        self.assertEqual(healthy.checks, 1)
+        self.assertIsNotNone(healthy.connection)
+        db.check_connection(healthy, now=131)
+        self.assertEqual(healthy.checks, 2)
+        broken = StubConnection(usable=False)
+        db.check_connection(broken, now=100)
+        self.assertIsNone(broken.connection)
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica'],
+    REPLICA_MAX_LAG=5,
+    REPLICA_LAG_CHECK_INTERVAL=5
+)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        routers.freshness.clear()
+        self.router = routers.ReplicaRouter()
+
+    def read_alias(self, lag=0):
+        with mock.patch.object(routers, 'replica_lag', return_value=lag):
+            return self.router.db_for_read(Task)
+
+    def test_reads_outside_requests_use_primary(self):
+        """Проверяем, что без replica_reads чтение идёт с основной базы."""
+        self.assertEqual(self.read_alias(), 'default')
+
+    def test_safe_reads_use_replica(self):
+        """Проверяем, что чтение внутри replica_reads идёт с реплики."""
+        with routers.replica_reads():
+            self.assertEqual(self.read_alias(), 'replica')
+
+    def test_reads_after_write_use_primary(self):
+        """Проверяем, что после записи чтение идёт с основной базы."""
+        with routers.replica_reads():
+            self.assertEqual(self.router.db_for_write(Task), 'default')
+            self.assertEqual(self.read_alias(), 'default')
+
+    def test_lagging_replica_is_skipped(self):
+        """Проверяем, что отставшая и недоступная реплики пропускаются,
+        а отставание проверяется не чаще заданного интервала."""
+        with routers.replica_reads():
+            self.assertEqual(self.read_alias(lag=60), 'default')
+            self.assertEqual(self.read_alias(lag=0), 'default')
+            routers.freshness.clear()
+            with mock.patch.object(
+                routers, 'replica_lag', side_effect=DatabaseError
+            ):
+                self.assertEqual(self.router.db_for_read(Task), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=10)
+class ReplicaPinningTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(
+            User.objects.create_user(username='testAuthorized')
+        )
+
+    def test_write_pins_client_to_primary(self):
+        """Проверяем, что после записи клиент читает с основной базы."""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новая запись'}
+        )
+        cookie = response.cookies[ReplicaRoutingMiddleware.cookie_name]
+        self.assertEqual(cookie['max-age'], 10)
+        middleware = ReplicaRoutingMiddleware(lambda request: None)
+        request = RequestFactory().get('/')
+        self.assertFalse(middleware.pinned(request))
+        request.COOKIES[cookie.key] = cookie.value
+        self.assertTrue(middleware.pinned(request))
+
+
+class TestCacheLocationTests(SimpleTestCase):
+    def test_tests_use_own_cache_dir(self):
+        """Проверяем, что тесты пишут общий кеш в свой временный каталог,
+        а не в каталог сервера разработки."""
+        location = settings.CACHES['shared']['LOCATION']
+        self.assertTrue(
+            os.path.basename(location).startswith('yatube_test_cache_')
+        )
+        self.assertTrue(os.path.isdir(location))
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-tests',
+    },
+})
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        stores.pop('shared', None)
+        self.cache = TwoTierCache('shared', {'OPTIONS': {
+            'LOCAL_TIMEOUT': 60,
+            'LOCAL_MAX_ENTRIES': 2,
+            'SHARED_ONLY_PREFIXES': ['version:'],
+            'LOCK_TIMEOUT': 2,
+        }})
+        self.cache.clear()
+
+    def test_values_are_kept_in_process_memory(self):
+        """Проверяем, что повторное чтение не обращается к общему кешу,
+        а ключи версий читаются только из него."""
+        self.cache.set('page', 'содержимое')
+        self.cache.set('version:index', 1)
+        self.cache.shared.set('page', 'изменено другим процессом')
+        self.cache.shared.set('version:index', 2)
+        self.assertEqual(self.cache.get('page'), 'содержимое')
+        self.assertEqual(self.cache.get('version:index'), 2)
+        self.assertEqual(self.cache.metrics()['local_hits'], 1)
+
+    def test_least_recently_used_values_are_evicted(self):
+        """Проверяем, что из памяти вытесняются давно читанные значения."""
+        for key in ('first', 'second'):
+            self.cache.set(key, key)
+        self.cache.get('first')
+        self.cache.set('third', 'third')
+        self.assertEqual(
+            list(self.cache.local.entries),
+            [self.cache.make_key('first'), self.cache.make_key('third')]
+        )
+        self.assertEqual(self.cache.get('second'), 'second')
+        self.assertEqual(self.cache.metrics()['shared_hits'], 1)
+
+    def test_short_timeouts_are_kept_in_memory(self):
+        """Проверяем, что в памяти значение живёт не дольше своего срока."""
+        self.cache.set('short', 'значение', timeout=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+
+    def test_value_is_computed_once(self):
+        """Проверяем, что одновременные промахи вычисляют значение один
+        раз, а остальные получают готовое."""
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'значение'
+
+        def read():
+            results.append(self.cache.get_or_set('slow', compute))
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['значение'] * 4)
+        self.assertEqual(self.cache.metrics()['lock_waits'], 3)
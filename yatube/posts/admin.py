@@ -1,10 +1,20 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 
+class FullTextSearchMixin:
+    """Поиск в админке по полнотекстовому индексу вместо LIKE."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.filter_queryset(queryset, search_term), False
+
+
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(FullTextSearchMixin, admin.ModelAdmin):
     """Класс настройки раздела записей."""
 
     list_display = (
@@ -23,9 +33,10 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
 
     def count_comments(self, object):
-        return object.comments.count()
+        return object.comments_count
 
     count_comments.short_description = 'Количество комментариев'
+    count_comments.admin_order_field = 'comments_count'
 
 
 @admin.register(Group)
@@ -45,13 +56,14 @@ class GroupAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
 
     def count_posts(self, object):
-        return object.posts.count()
+        return object.posts_count
 
     count_posts.short_description = 'Количество записей'
+    count_posts.admin_order_field = 'posts_count'
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     """Класс настройки раздела комментариев."""
 
     list_display = (
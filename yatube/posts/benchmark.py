@@ -0,0 +1,399 @@
+"""Нагрузочный прогон страниц приложения posts.
+
+seed наполняет базу пользователями, группами, подписками, записями
+и комментариями через mixer и Faker, run обходит все маршруты
+posts.urls несколькими потоками тестовым клиентом или через локальный
+WSGI-сервер, summarize сводит задержки, число SQL-запросов и
+пропускную способность, compare сверяет сводку с базовой.
+"""
+import logging
+import math
+import queue
+import random
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from faker import Faker
+from mixer.backend.django import mixer
+
+from core import tasks
+
+from . import suggestions
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Dataset:
+    """Созданные seed объекты, из которых выбираются параметры запросов."""
+
+    def __init__(self, users, groups, posts):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.posts_by_author = defaultdict(list)
+        for post in posts:
+            self.posts_by_author[post.author_id].append(post)
+        self.words = [
+            word for post in posts[:100] for word in post.text.split()
+            if len(word) > 3
+        ]
+
+
+def seed(users=50, groups=5, posts=500, comments=1000, follows=10,
+         images=0.1, random_seed=None):
+    """Наполняет базу тестовыми данными и возвращает Dataset.
+
+    follows — число подписок каждого пользователя, images — доля записей
+    с картинкой. Миниатюры картинок создаются сразу, через очередь задач,
+    рекомендации авторов пересчитываются в конце. Пользователи создаются
+    персоналом, чтобы выгрузки сообществ отвечали данными, а не отказом.
+    """
+    rng = random.Random(random_seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+    image = ''
+    if images:
+        image = default_storage.save(
+            'posts/benchmark.gif', ContentFile(SMALL_GIF)
+        )
+    user_list = mixer.cycle(users).blend(User, is_staff=True)
+    group_list = mixer.cycle(groups).blend(Group)
+    for user in user_list:
+        candidates = [author for author in user_list if author != user]
+        for author in rng.sample(candidates, min(follows, len(candidates))):
+            Follow.objects.create(user=user, author=author)
+    post_list = [
+        mixer.blend(
+            Post,
+            author=rng.choice(user_list),
+            group=rng.choice(group_list + [None]),
+            text=fake.paragraph(nb_sentences=5),
+            image=image if rng.random() < images else ''
+        )
+        for _ in range(posts)
+    ]
+    for _ in range(comments):
+        mixer.blend(
+            Comment,
+            post=rng.choice(post_list),
+            author=rng.choice(user_list),
+            text=fake.sentence()
+        )
+    tasks.discover()
+    while tasks.run_next():
+        pass
+    suggestions.rebuild()
+    return Dataset(user_list, group_list, post_list)
+
+
+def scenarios(dataset, user, rng):
+    """Возвращает фабрики запросов для каждого маршрута posts.urls.
+
+    Фабрика возвращает кортеж (метод, адрес, данные).
+    """
+    def post():
+        return rng.choice(dataset.posts)
+
+    def author():
+        return rng.choice(dataset.users)
+
+    def own_post():
+        own = dataset.posts_by_author.get(user.pk) or dataset.posts
+        return rng.choice(own)
+
+    def group():
+        return rng.choice(dataset.groups)
+
+    return {
+        'posts:index': lambda: ('get', reverse('posts:index'), {}),
+        'posts:index_rss': lambda: ('get', reverse('posts:index_rss'), {}),
+        'posts:index_atom': lambda: ('get', reverse('posts:index_atom'), {}),
+        'posts:group_rss': lambda: ('get', reverse(
+            'posts:group_rss', args=(group().slug,)
+        ), {}),
+        'posts:group_atom': lambda: ('get', reverse(
+            'posts:group_atom', args=(group().slug,)
+        ), {}),
+        'posts:profile_rss': lambda: ('get', reverse(
+            'posts:profile_rss', args=(author().username,)
+        ), {}),
+        'posts:profile_atom': lambda: ('get', reverse(
+            'posts:profile_atom', args=(author().username,)
+        ), {}),
+        'posts:group_list': lambda: ('get', reverse(
+            'posts:group_list', args=(group().slug,)
+        ), {}),
+        'posts:profile': lambda: ('get', reverse(
+            'posts:profile', args=(author().username,)
+        ), {}),
+        'posts:profile_followers': lambda: ('get', reverse(
+            'posts:profile_followers', args=(author().username,)
+        ), {}),
+        'posts:profile_following': lambda: ('get', reverse(
+            'posts:profile_following', args=(author().username,)
+        ), {}),
+        'posts:search': lambda: ('get', reverse('posts:search'), {
+            'q': rng.choice(dataset.words or ['пост'])
+        }),
+        'posts:post_detail': lambda: ('get', reverse(
+            'posts:post_detail', args=(post().pk,)
+        ), {}),
+        'posts:post_comments': lambda: ('get', reverse(
+            'posts:post_comments', args=(post().pk,)
+        ), {}),
+        'posts:post_create': lambda: ('post', reverse('posts:post_create'), {
+            'text': 'Нагрузочная запись'
+        }),
+        'posts:post_edit': lambda: ('post', reverse(
+            'posts:post_edit', args=(own_post().pk,)
+        ), {'text': 'Изменённая нагрузочная запись'}),
+        'posts:add_comment': lambda: ('post', reverse(
+            'posts:add_comment', args=(post().pk,)
+        ), {'text': 'Нагрузочный комментарий'}),
+        'posts:follow_index': lambda: (
+            'get', reverse('posts:follow_index'), {}
+        ),
+        'posts:follow_bulk': lambda: ('post', reverse('posts:follow_bulk'), {
+            'follow': [author().username for _ in range(5)],
+            'unfollow': [author().username for _ in range(5)],
+        }),
+        'posts:profile_follow': lambda: ('get', reverse(
+            'posts:profile_follow', args=(author().username,)
+        ), {}),
+        'posts:profile_unfollow': lambda: ('get', reverse(
+            'posts:profile_unfollow', args=(author().username,)
+        ), {}),
+        'posts:export_author': lambda: ('get', reverse(
+            'posts:export_author', args=(user.username, 'posts')
+        ), {}),
+        'posts:export_group': lambda: ('get', reverse(
+            'posts:export_group', args=(group().slug, 'posts')
+        ), {}),
+    }
+
+
+class ClientSession:
+    """Отправляет запросы тестовым клиентом Django.
+
+    Клиент подписывается на общий сигнал got_request_exception, поэтому
+    в нескольких потоках исключение одного клиента поднимается в других;
+    клиент используется только в одном потоке.
+    """
+
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def request(self, method, url, data):
+        response = getattr(self.client, method)(url, data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code, response.get('X-Query-Count')
+
+
+class ServerSession:
+    """Отправляет запросы локальному WSGI-серверу по HTTP."""
+
+    def __init__(self, user, server_url):
+        client = Client()
+        client.force_login(user)
+        self.server_url = server_url
+        self.token = get_random_string(32)
+        self.session = requests.Session()
+        for name, cookie in client.cookies.items():
+            self.session.cookies.set(name, cookie.value)
+        self.session.cookies.set('csrftoken', self.token)
+
+    def request(self, method, url, data):
+        if method == 'get':
+            response = self.session.get(
+                self.server_url + url, params=data, allow_redirects=False
+            )
+        else:
+            response = self.session.post(
+                self.server_url + url,
+                data=data,
+                headers={'X-CSRFToken': self.token},
+                allow_redirects=False
+            )
+        return response.status_code, response.headers.get('X-Query-Count')
+
+
+def work(session, factories, jobs, results):
+    """Выполняет запросы из очереди jobs, пока она не опустеет.
+
+    Исключение, выброшенное представлением, считается ответом 500.
+    """
+    while True:
+        try:
+            route = jobs.get_nowait()
+        except queue.Empty:
+            return
+        method, url, data = factories[route]()
+        start = time.perf_counter()
+        try:
+            status, queries = session.request(method, url, data)
+        except Exception as error:
+            logger.warning('%s %s: %r', method.upper(), url, error)
+            status, queries = 500, None
+        results.append((
+            route,
+            time.perf_counter() - start,
+            int(queries) if queries is not None else None,
+            status
+        ))
+
+
+def work_in_thread(*args):
+    try:
+        work(*args)
+    finally:
+        connections.close_all()
+
+
+def run(dataset, requests_per_route=20, concurrency=4, server_url=None,
+        random_seed=None, routes=None):
+    """Обходит маршруты posts.urls и возвращает сводку summarize.
+
+    Каждый поток работает от имени своего пользователя. Без server_url
+    запросы идут через тестовый клиент в текущем потоке, поэтому при
+    concurrency больше 1 server_url обязателен. Число SQL-запросов
+    берётся из заголовка X-Query-Count.
+    """
+    if concurrency > 1 and not server_url:
+        raise ValueError('Параллельный прогон выполняется через server_url')
+    rng = random.Random(random_seed)
+    sessions = []
+    for number in range(concurrency):
+        user = dataset.users[number % len(dataset.users)]
+        session = (
+            ServerSession(user, server_url) if server_url
+            else ClientSession(user)
+        )
+        factories = scenarios(dataset, user, random.Random(rng.random()))
+        sessions.append((session, factories))
+    names = routes or list(sessions[0][1])
+    job_list = names * requests_per_route
+    rng.shuffle(job_list)
+    jobs = queue.Queue()
+    for route in job_list:
+        jobs.put(route)
+    results = []
+    start = time.perf_counter()
+    if not server_url:
+        work(*sessions[0], jobs, results)
+    else:
+        threads = [
+            threading.Thread(
+                target=work_in_thread,
+                args=(session, factories, jobs, results)
+            )
+            for session, factories in sessions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return summarize(results, time.perf_counter() - start)
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def summarize(results, elapsed):
+    """Сводит результаты по маршрутам.
+
+    Задержки в миллисекундах, throughput — запросов в секунду по всему
+    прогону.
+    """
+    by_route = defaultdict(list)
+    for route, duration, queries, status in results:
+        by_route[route].append((duration, queries, status))
+    routes = {}
+    for route, rows in sorted(by_route.items()):
+        durations = [duration * 1000 for duration, _, _ in rows]
+        queries = [count for _, count, _ in rows if count is not None]
+        summary = {
+            'requests': len(rows),
+            'errors': sum(status >= 500 for _, _, status in rows),
+            'queries': round(sum(queries) / len(queries), 2)
+            if queries else None,
+            'max_queries': max(queries) if queries else None,
+        }
+        for percent in PERCENTILES:
+            summary[f'p{percent}'] = round(percentile(durations, percent), 2)
+        routes[route] = summary
+    return {
+        'requests': len(results),
+        'elapsed': round(elapsed, 3),
+        'throughput': round(len(results) / elapsed, 2) if elapsed else 0,
+        'routes': routes,
+    }
+
+
+def compare(summary, baseline, tolerance=0.25, min_delta=10):
+    """Сравнивает сводку с базовой и возвращает список регрессий.
+
+    Регрессией считаются рост числа запросов и ошибок сервера, падение
+    пропускной способности больше чем на tolerance и замедление
+    маршрута. Одиночные выбросы сильно сдвигают p95 небольшой выборки,
+    поэтому замедлением считается рост больше чем на tolerance и p95,
+    и p50, если p50 к тому же вырос больше чем на min_delta мс.
+    """
+    regressions = []
+    for route, current in summary['routes'].items():
+        previous = baseline['routes'].get(route)
+        if previous is None:
+            continue
+        if current['errors'] > previous['errors']:
+            regressions.append(
+                f'{route}: ошибок {current["errors"]} '
+                f'вместо {previous["errors"]}'
+            )
+        if (current['max_queries'] is not None
+                and previous['max_queries'] is not None
+                and current['max_queries'] > previous['max_queries']):
+            regressions.append(
+                f'{route}: запросов {current["max_queries"]} '
+                f'вместо {previous["max_queries"]}'
+            )
+        if (current['p95'] > previous['p95'] * (1 + tolerance)
+                and current['p50'] > previous['p50'] * (1 + tolerance)
+                and current['p50'] - previous['p50'] > min_delta):
+            regressions.append(
+                f'{route}: p50 {current["p50"]} и p95 {current["p95"]} мс '
+                f'вместо {previous["p50"]} и {previous["p95"]} мс'
+            )
+    if summary['throughput'] < baseline['throughput'] * (1 - tolerance):
+        regressions.append(
+            f'пропускная способность {summary["throughput"]} '
+            f'вместо {baseline["throughput"]} запросов в секунду'
+        )
+    return regressions
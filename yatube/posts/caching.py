@@ -0,0 +1,96 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import tasks
+
+INDEX = 'index'
+CARDS = 'cards'
+COMMENTS = 'comments'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def version_key(scope):
+    return f'posts:version:{scope}'
+
+
+def version(scope):
+    """Возвращает текущую версию кеша для области scope.
+
+    Если версия вытеснена из кеша, начинается новая от текущего времени,
+    чтобы не совпасть с версиями уже сохранённых фрагментов.
+    """
+    return cache.get_or_set(version_key(scope), time.time_ns, None)
+
+
+def bump(scope):
+    """Делает устаревшими все закешированные фрагменты области.
+
+    Версия меняется после фиксации текущей транзакции: запрос, пришедший
+    до COMMIT, иначе закешировал бы старые строки под новой версией.
+    """
+    transaction.on_commit(lambda: bumped(scope))
+
+
+def renewal_delay():
+    return settings.REPLICA_MAX_LAG + settings.REPLICA_LAG_CHECK_INTERVAL
+
+
+def bumped(scope):
+    """Начинает новую версию и при репликах планирует повторный сброс.
+
+    Пока реплики догоняют основную базу, безопасные запросы могут
+    заполнить кеш под новой версией устаревшими данными, поэтому через
+    renewal_delay секунд версия сбрасывается ещё раз. Сбросы одной
+    области за это время обходятся одной фоновой задачей.
+    """
+    renew(scope)
+    if settings.DATABASE_REPLICAS:
+        cache.set(
+            f'{version_key(scope)}:bumped', time.time(), renewal_delay()
+        )
+        schedule_renewal(scope, renewal_delay())
+
+
+def schedule_renewal(scope, delay):
+    """Ставит повторный сброс области, если он ещё не запланирован."""
+    if cache.add(
+        f'{version_key(scope)}:renewal', True,
+        delay + settings.TASKS_VISIBILITY_TIMEOUT
+    ):
+        tasks.renew_version.schedule(delay, scope)
+
+
+def renew_after_lag(scope):
+    """Повторно сбрасывает версию области.
+
+    Если область сбрасывали после постановки задачи, следующий повтор
+    планируется на renewal_delay секунд после последнего сброса.
+    """
+    cache.delete(f'{version_key(scope)}:renewal')
+    renew(scope)
+    last = cache.get(f'{version_key(scope)}:bumped', 0)
+    remaining = last + renewal_delay() - time.time()
+    if remaining > 0:
+        schedule_renewal(scope, remaining)
+
+
+def renew(scope):
+    """Начинает новую версию кеша области."""
+    try:
+        cache.incr(version_key(scope))
+    except ValueError:
+        cache.set(version_key(scope), time.time_ns(), None)
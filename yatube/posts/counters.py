@@ -0,0 +1,137 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def change(queryset, field, delta):
+    """Изменяет счётчик на delta одним UPDATE без чтения строки.
+
+    Счётчик не уходит в минус: такое расхождение исправит сверка.
+    """
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def count_author_post(user_id):
+    """Увеличивает счётчик записей автора, создавая строку при отсутствии."""
+    stats = UserStats.objects.filter(user_id=user_id)
+    if not change(stats, 'posts_count', 1):
+        UserStats.objects.get_or_create(user_id=user_id)
+        change(stats, 'posts_count', 1)
+
+
+def post_saved(post, created):
+    """Учитывает новую запись или её перенос в другое сообщество."""
+    if created:
+        count_author_post(post.author_id)
+        old_group_id = None
+    elif 'group_id' in post.get_deferred_fields():
+        return
+    else:
+        old_group_id = getattr(post, '_loaded_group_id', post.group_id)
+    if old_group_id == post.group_id:
+        return
+    if old_group_id is not None:
+        change(Group.objects.filter(pk=old_group_id), 'posts_count', -1)
+    if post.group_id is not None:
+        change(Group.objects.filter(pk=post.group_id), 'posts_count', 1)
+
+
+def post_deleted(post):
+    """Учитывает удаление записи."""
+    change(UserStats.objects.filter(user_id=post.author_id), 'posts_count', -1)
+    if post.group_id is not None:
+        change(Group.objects.filter(pk=post.group_id), 'posts_count', -1)
+
+
+def comment_changed(comment, delta):
+    """Учитывает добавление или удаление комментария."""
+    change(Post.objects.filter(pk=comment.post_id), 'comments_count', delta)
+
+
+def follow_changed(follow, delta):
+    """Учитывает подписку или отписку у автора и подписчика."""
+    follows_changed(follow.user_id, [follow.author_id], delta)
+
+
+def follows_changed(user_id, author_ids, delta):
+    """Учитывает подписки или отписки пользователя от нескольких авторов
+    двумя UPDATE."""
+    if not author_ids:
+        return
+    change(
+        UserStats.objects.filter(user_id__in=author_ids),
+        'followers_count',
+        delta
+    )
+    change(
+        UserStats.objects.filter(user_id=user_id),
+        'following_count',
+        delta * len(author_ids)
+    )
+
+
+def count(queryset, field, ref='pk'):
+    """Подзапрос с количеством строк queryset, ссылающихся полем field
+    на строку внешнего запроса."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef(ref)}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), Value(0))
+
+
+def reconcile_field(queryset, field, actual):
+    """Исправляет строки, в которых счётчик разошёлся с данными.
+
+    Возвращает количество исправленных строк.
+    """
+    drifted = queryset.annotate(actual=actual).exclude(**{field: F('actual')})
+    fixed = 0
+    for pk, value in drifted.values_list('pk', 'actual').iterator():
+        queryset.filter(pk=pk).update(**{field: value})
+        fixed += 1
+    return fixed
+
+
+def reconcile():
+    """Сверяет все счётчики с данными.
+
+    Возвращает словарь с количеством исправленных строк по счётчикам.
+    """
+    UserStats.objects.bulk_create(
+        (
+            UserStats(user_id=user_id) for user_id in
+            User.objects.filter(stats__isnull=True).values_list(
+                'pk', flat=True
+            ).iterator()
+        ),
+        ignore_conflicts=True
+    )
+    return {
+        'user.posts_count': reconcile_field(
+            UserStats.objects.all(),
+            'posts_count',
+            count(Post.objects, 'author', 'user')
+        ),
+        'group.posts_count': reconcile_field(
+            Group.objects.all(), 'posts_count', count(Post.objects, 'group')
+        ),
+        'user.followers_count': reconcile_field(
+            UserStats.objects.all(),
+            'followers_count',
+            count(Follow.objects, 'author', 'user')
+        ),
+        'user.following_count': reconcile_field(
+            UserStats.objects.all(),
+            'following_count',
+            count(Follow.objects, 'user', 'user')
+        ),
+        'post.comments_count': reconcile_field(
+            Post.objects.all(),
+            'comments_count',
+            count(Comment.objects, 'post')
+        ),
+    }
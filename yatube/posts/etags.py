@@ -0,0 +1,59 @@
+"""Валидаторы условных GET-запросов страниц записей.
+
+ETag строится из версий кеша, которые сбрасываются сигналами, и не
+требует отрисовки страницы. В него входят пользователь и параметры
+страницы, потому что от них зависит содержимое ответа. Объекты
+страниц ищутся через lookups и достаются представлению без повторного
+запроса.
+"""
+import hashlib
+
+from . import caching, lookups
+
+
+def make_etag(request, *parts):
+    user = request.user.pk if request.user.is_authenticated else 'anonymous'
+    raw = ':'.join(
+        str(part) for part in (*parts, user, request.GET.urlencode())
+    )
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def index_etag(request):
+    return make_etag(request, caching.version(caching.INDEX))
+
+
+def group_etag(request, slug):
+    group = lookups.group(request, slug)
+    if group is None:
+        return None
+    return make_etag(
+        request,
+        caching.version(caching.group_scope(group.pk)),
+        caching.version(caching.CARDS)
+    )
+
+
+def profile_etag(request, username):
+    author = lookups.author(request, username)
+    if author is None:
+        return None
+    return make_etag(
+        request,
+        caching.version(caching.author_scope(author.pk)),
+        caching.version(caching.CARDS)
+    )
+
+
+def post_etag(request, post_id):
+    post = lookups.post(request, post_id)
+    if post is None:
+        return None
+    stats = getattr(post.author, 'stats', None)
+    return make_etag(
+        request,
+        post.updated,
+        caching.version(caching.post_scope(post.pk)),
+        stats and stats.posts_count,
+        caching.version(caching.CARDS)
+    )
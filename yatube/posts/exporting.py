@@ -0,0 +1,99 @@
+"""Потоковая выгрузка записей, комментариев и подписок.
+
+Строки читаются через values_list().iterator(chunk_size), поэтому
+выгрузка любого объёма занимает постоянную память. Поля совпадают
+с форматом команды import_data, так что выгрузку можно загрузить
+обратно.
+"""
+import csv
+import json
+from datetime import datetime
+
+from django.conf import settings
+
+from .models import Comment, Follow, Post
+
+EXPORTS = {
+    'posts': (Post, {
+        'id': 'pk',
+        'text': 'text',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'pub_date': 'pub_date',
+        'image': 'image',
+    }),
+    'comments': (Comment, {
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    }),
+    'follows': (Follow, {
+        'user': 'user__username',
+        'author': 'author__username',
+    }),
+}
+
+# Условия отбора по автору и по сообществу; None — выгрузка невозможна.
+AUTHOR_FILTERS = {'posts': 'author', 'comments': 'author', 'follows': 'user'}
+GROUP_FILTERS = {'posts': 'group', 'comments': 'post__group', 'follows': None}
+
+FORMATS = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def fields(kind):
+    return list(EXPORTS[kind][1])
+
+
+def rows(kind, author=None, group=None, chunk_size=None):
+    """Лениво отдаёт строки выгрузки kind словарями.
+
+    author и group ограничивают выгрузку содержимым автора
+    или сообщества.
+    """
+    model, columns = EXPORTS[kind]
+    queryset = model.objects.all()
+    if author is not None:
+        queryset = queryset.filter(**{AUTHOR_FILTERS[kind]: author})
+    if group is not None:
+        queryset = queryset.filter(**{GROUP_FILTERS[kind]: group})
+    values = queryset.order_by('pk').values_list(*columns.values())
+    names = list(columns)
+    for row in values.iterator(
+        chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE
+    ):
+        yield {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in zip(names, row)
+        }
+
+
+def jsonl_lines(kind, rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Файлоподобный объект, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(kind, rows):
+    names = fields(kind)
+    writer = csv.writer(Echo())
+    yield writer.writerow(names)
+    for row in rows:
+        yield writer.writerow([row[name] for name in names])
+
+
+SERIALIZERS = {'jsonl': jsonl_lines, 'csv': csv_lines}
+
+
+def lines(kind, file_format, **filters):
+    """Отдаёт строки выгрузки в формате jsonl или csv."""
+    return SERIALIZERS[file_format](kind, rows(kind, **filters))
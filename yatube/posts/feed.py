@@ -0,0 +1,153 @@
+from heapq import merge
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import FeedItem, Follow, Post, PulledAuthor
+from .paginators import NEXT, CursorPaginator, encode_cursor, item_value
+
+
+def fan_out(post):
+    """Разносит новую запись по лентам подписчиков автора.
+
+    Если подписчиков больше FEED_FANOUT_LIMIT, автор помечается
+    как читаемый напрямую и запись в ленты не копируется.
+    """
+    author = post.author
+    if PulledAuthor.objects.filter(author=author).exists():
+        return
+    followers = Follow.objects.filter(author=author)
+    if followers.count() > settings.FEED_FANOUT_LIMIT:
+        PulledAuthor.objects.get_or_create(author=author)
+        return
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(
+                user_id=user_id,
+                post=post,
+                author=author,
+                pub_date=post.pub_date
+            )
+            for user_id in followers.values_list('user_id', flat=True)
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill(user, author):
+    """Добавляет в ленту пользователя записи нового автора."""
+    backfill_many(user.pk, [author.pk])
+
+
+def backfill_many(user_id, author_ids):
+    """Добавляет в ленту пользователя записи новых авторов одним
+    проходом; записи авторов без разноса пропускаются.
+
+    Копируются только FEED_BACKFILL_LIMIT самых новых записей этих
+    авторов, чтобы подписка не переносила в ленту всю их историю.
+    """
+    posts = Post.objects.filter(
+        author_id__in=author_ids, author__pulled_feed__isnull=True
+    ).order_by('-pub_date', '-pk').values_list(
+        'pk', 'author_id', 'pub_date'
+    )[:settings.FEED_BACKFILL_LIMIT]
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date
+            )
+            for post_id, author_id, pub_date in posts.iterator()
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def prune(user, author):
+    """Убирает из ленты пользователя записи автора."""
+    prune_many(user, [author])
+
+
+def prune_many(user, authors):
+    """Убирает из ленты пользователя записи авторов одним DELETE."""
+    FeedItem.objects.filter(user=user, author__in=authors).delete()
+
+
+def mark_pulled():
+    """Помечает авторов, у которых подписчиков больше FEED_FANOUT_LIMIT,
+    как читаемых напрямую."""
+    authors = Follow.objects.order_by().values('author').annotate(
+        total=Count('pk')
+    ).filter(total__gt=settings.FEED_FANOUT_LIMIT).values_list(
+        'author', flat=True
+    )
+    PulledAuthor.objects.bulk_create(
+        (PulledAuthor(author_id=author_id) for author_id in authors),
+        ignore_conflicts=True
+    )
+
+
+def rebuild():
+    """Заново заполняет ленты всех пользователей по подпискам.
+
+    Популярные авторы сначала помечаются без разноса, и их записи
+    в ленты не копируются.
+    """
+    FeedItem.objects.all().delete()
+    mark_pulled()
+    for follow in Follow.objects.select_related('user', 'author').iterator():
+        backfill(follow.user, follow.author)
+
+
+class FeedPaginator(CursorPaginator):
+    """Паджинатор ленты подписок.
+
+    Ключи записей берутся из ленты пользователя и объединяются с записями
+    авторов без разноса, которые читаются напрямую из таблицы записей.
+    Сами записи загружаются по ключам из posts, который может быть
+    и queryset из values() с полями pk и pub_date.
+    """
+
+    def __init__(self, user, per_page, posts=None):
+        self.pulled_ids = list(user.follower.filter(
+            author__pulled_feed__isnull=False
+        ).values_list('author_id', flat=True))
+        if posts is None:
+            posts = Post.objects.select_related('author', 'group')
+        self.posts = posts
+        super().__init__(
+            user.feed_items.values_list('pub_date', 'post_id'),
+            per_page,
+            tiebreak='post_id'
+        )
+
+    def _fetch(self, direction, position):
+        limit = self.per_page + 1
+        keys = self.keyset(self.object_list, direction, position)[:limit]
+        if self.pulled_ids:
+            pulled = Post.objects.filter(
+                author__in=self.pulled_ids
+            ).order_by('-pub_date', '-pk').values_list('pub_date', 'pk')
+            pulled = self.keyset(pulled, direction, position, tiebreak='pk')
+            keys = merge(
+                keys, pulled[:limit], reverse=direction == NEXT
+            )
+        post_ids = []
+        for _, post_id in keys:
+            if not post_ids or post_ids[-1] != post_id:
+                post_ids.append(post_id)
+        post_ids = post_ids[:limit]
+        posts = {
+            item_value(post, 'pk'): post
+            for post in self.posts.filter(pk__in=post_ids)
+        }
+        return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+    def _cursor(self, direction, post):
+        return encode_cursor(
+            direction, item_value(post, 'pub_date'), item_value(post, 'pk')
+        )
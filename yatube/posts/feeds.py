@@ -0,0 +1,176 @@
+"""RSS и Atom ленты записей: всех, сообщества и автора.
+
+Готовый XML хранится в кеше под версией области кеша, которую сигналы
+сбрасывают при сохранении записей, поэтому опрос ленты стоит одного
+обращения к кешу. Повторный запрос с If-None-Match или
+If-Modified-Since получает 304.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+from . import caching
+from .models import Group, Post, User
+
+FEED_TYPES = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+
+
+class PostsFeed(Feed):
+    """Последние записи сайта."""
+
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def __init__(self, feed_format):
+        super().__init__()
+        self.feed_type = FEED_TYPES[feed_format]
+
+    def link(self):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).select_related('author', 'group').order_by(
+            '-pub_date', '-pk'
+        )[:settings.SYNDICATION_ITEMS]
+
+    def item_title(self, post):
+        return Truncator(post.text).words(8)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=(post.pk,))
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_updateddate(self, post):
+        return post.updated
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_categories(self, post):
+        return (post.group.title,) if post.group else ()
+
+
+class GroupPostsFeed(PostsFeed):
+    """Последние записи сообщества."""
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+    def posts(self, group):
+        return group.posts.all()
+
+
+class AuthorPostsFeed(PostsFeed):
+    """Последние записи автора."""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи автора {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def posts(self, author):
+        return author.posts.all()
+
+
+def conditional(request, entry):
+    response = get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified']
+    )
+    if response is None:
+        response = HttpResponse(
+            entry['content'], content_type=entry['content_type']
+        )
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    return response
+
+
+def cached_feed(request, feed_class, scope, feed_format, **kwargs):
+    """Отдаёт ленту из кеша, отрисовывая её только после изменений.
+
+    В ключ входит и версия карточек, которая меняется при изменении
+    авторов и сообществ. Last-Modified — время построения ленты, а не
+    дата последней записи: удаление записи или переименование автора
+    меняют XML, не добавляя более новых записей.
+    """
+    key = (
+        f'posts:feed:{feed_format}:{scope}:{caching.version(scope)}:'
+        f'{caching.version(caching.CARDS)}'
+    )
+    entry = cache.get(key)
+    if entry is None:
+        response = feed_class(feed_format)(request, **kwargs)
+        entry = {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'etag': '"{}"'.format(hashlib.md5(key.encode()).hexdigest()),
+            'last_modified': int(timezone.now().timestamp()),
+        }
+        cache.set(key, entry, settings.SYNDICATION_CACHE_TIMEOUT)
+    return conditional(request, entry)
+
+
+def index_feed(request, feed_format):
+    return cached_feed(request, PostsFeed, caching.INDEX, feed_format)
+
+
+def group_feed(request, slug, feed_format):
+    group_id = get_object_or_404(
+        Group.objects.values_list('pk', flat=True), slug=slug
+    )
+    return cached_feed(
+        request,
+        GroupPostsFeed,
+        caching.group_scope(group_id),
+        feed_format,
+        slug=slug
+    )
+
+
+def author_feed(request, username, feed_format):
+    author_id = get_object_or_404(
+        User.objects.values_list('pk', flat=True), username=username
+    )
+    return cached_feed(
+        request,
+        AuthorPostsFeed,
+        caching.author_scope(author_id),
+        feed_format,
+        username=username
+    )
@@ -0,0 +1,133 @@
+"""Подписки пользователя: кеш множества авторов и пакетные изменения.
+
+Множество id хранится в кеше под ключом пользователя и сбрасывается
+сигналами Follow, поэтому проверка подписки — поиск в памяти, а не
+запрос к базе. В запросе множество доступно как request.followed_ids,
+в шаблонах — через фильтр followed_by.
+
+follow_many и unfollow_many меняют сразу много подписок без сигналов
+на каждую строку и сами обновляют ленту, счётчики и кеш. Строки
+вставляются и удаляются одним запросом с RETURNING (SQLite 3.35+,
+PostgreSQL), поэтому производные данные меняются только для подписок,
+которые изменил именно этот запрос, а не параллельный.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from . import caching, counters, feed, suggestions
+from .models import Follow, User
+
+
+INSERT_SQL = (
+    'INSERT INTO {table} (user_id, author_id) VALUES {rows} '
+    'ON CONFLICT DO NOTHING RETURNING author_id'
+)
+DELETE_SQL = (
+    'DELETE FROM {table} WHERE user_id = %s AND author_id IN ({authors}) '
+    'RETURNING author_id'
+)
+
+
+def cache_key(user_id):
+    return f'posts:following:{user_id}'
+
+
+def followed_ids(user):
+    """Id авторов, на которых подписан user; для гостя пустое."""
+    if not user.is_authenticated:
+        return frozenset()
+    return cache.get_or_set(
+        cache_key(user.pk),
+        lambda: frozenset(
+            Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True
+            )
+        ),
+        settings.FOLLOWING_CACHE_TIMEOUT
+    )
+
+
+def invalidate(*user_ids):
+    """Сбрасывает множества подписок пользователей после фиксации
+    текущей транзакции, чтобы в кеш не попали старые подписки."""
+    keys = [cache_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def changed(user, author_ids, delta):
+    """Обновляет производные данные после пакета подписок или отписок."""
+    counters.follows_changed(user.pk, author_ids, delta)
+    if delta > 0:
+        feed.backfill_many(user.pk, author_ids)
+        suggestions.discard(user.pk, author_ids)
+    else:
+        feed.prune_many(user.pk, author_ids)
+    for user_id in (user.pk, *author_ids):
+        caching.bump(caching.author_scope(user_id))
+    invalidate(user.pk)
+
+
+def insert_follows(user_id, author_ids):
+    """Подписывает пользователя на авторов одним INSERT без сигналов.
+
+    Уже существующие подписки пропускаются. Возвращает id авторов,
+    подписки на которых вставлены этим запросом.
+    """
+    sql = INSERT_SQL.format(
+        table=Follow._meta.db_table,
+        rows=', '.join(['(%s, %s)'] * len(author_ids))
+    )
+    params = [value for author_id in author_ids
+              for value in (user_id, author_id)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [author_id for author_id, in cursor.fetchall()]
+
+
+def delete_follows(user_id, author_ids):
+    """Удаляет подписки пользователя на авторов одним DELETE без сигналов.
+
+    Возвращает id авторов, подписки на которых удалены этим запросом.
+    """
+    sql = DELETE_SQL.format(
+        table=Follow._meta.db_table,
+        authors=', '.join(['%s'] * len(author_ids))
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, *author_ids])
+        return [author_id for author_id, in cursor.fetchall()]
+
+
+def follow_many(user, usernames):
+    """Подписывает user на авторов по username.
+
+    Возвращает username авторов, на которых подписка появилась.
+    """
+    authors = dict(User.objects.filter(username__in=usernames).exclude(
+        pk=user.pk
+    ).values_list('pk', 'username'))
+    if not authors:
+        return []
+    with transaction.atomic():
+        added = insert_follows(user.pk, list(authors))
+        if added:
+            changed(user, added, 1)
+    return sorted(authors[author_id] for author_id in added)
+
+
+def unfollow_many(user, usernames):
+    """Отписывает user от авторов по username.
+
+    Возвращает username авторов, подписка на которых была удалена.
+    """
+    authors = dict(User.objects.filter(username__in=usernames).values_list(
+        'pk', 'username'
+    ))
+    if not authors:
+        return []
+    with transaction.atomic():
+        removed = delete_follows(user.pk, list(authors))
+        if removed:
+            changed(user, removed, -1)
+    return sorted(authors[author_id] for author_id in removed)
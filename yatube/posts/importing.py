@@ -0,0 +1,230 @@
+"""Массовая загрузка сообществ, записей, комментариев и подписок.
+
+Строки читаются потоком из JSONL или CSV и сохраняются bulk_create
+пачками, каждая пачка в своей транзакции. bulk_create не отправляет
+сигналы, поэтому счётчики, ленты, поисковый индекс и версии кеша
+пересчитываются один раз в конце загрузки функцией rebuild.
+
+Поля строк:
+    groups: slug, title, description;
+    posts: id (необязательно), text, author, group, pub_date, image;
+    comments: post, author, text, created;
+    follows: user, author.
+Пользователи указываются по username и создаются без пароля, если их
+ещё нет; сообщества — по slug, записи — по id.
+"""
+import csv
+import json
+import os
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching, counters, feed, following, search
+from .models import Comment, Follow, Group, Post, User
+
+KINDS = ('groups', 'posts', 'comments', 'follows')
+
+
+def read_rows(path, file_format=None):
+    """Построчно читает словари из файла JSONL или CSV.
+
+    Формат определяется по расширению, если не задан явно.
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip('.')
+    with open(path, encoding='utf-8', newline='') as source:
+        if file_format == 'csv':
+            yield from csv.DictReader(source)
+        elif file_format in ('jsonl', 'json'):
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f'Неизвестный формат файла {path}')
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_date(value):
+    """Разбирает дату ISO 8601; без даты возвращает текущее время."""
+    if not value:
+        return timezone.now()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Неверная дата {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+@contextmanager
+def explicit_dates():
+    """Отключает auto_now и auto_now_add, чтобы сохранить даты из файла.
+
+    Меняет поля моделей на уровне процесса, поэтому подходит только
+    для команд управления.
+    """
+    fields = (
+        Post._meta.get_field('pub_date'),
+        Post._meta.get_field('updated'),
+        Comment._meta.get_field('created'),
+    )
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """Загружает строки пачками и запоминает, что затронула загрузка."""
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.user_ids = {}
+        self.group_ids = {}
+        self.touched_groups = set()
+        self.touched_authors = set()
+        self.touched_followers = set()
+
+    def users(self, usernames):
+        """Возвращает id пользователей по username, создавая недостающих."""
+        missing = set(usernames) - set(self.user_ids)
+        if not missing:
+            return self.user_ids
+        self.user_ids.update(User.objects.filter(
+            username__in=missing
+        ).values_list('username', 'pk'))
+        missing -= set(self.user_ids)
+        if missing:
+            password = make_password(None)
+            User.objects.bulk_create(
+                (User(username=name, password=password) for name in missing),
+                ignore_conflicts=True
+            )
+            self.user_ids.update(User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'pk'))
+        return self.user_ids
+
+    def groups(self, slugs):
+        """Возвращает id сообществ по slug."""
+        missing = set(slugs) - set(self.group_ids)
+        if missing:
+            self.group_ids.update(Group.objects.filter(
+                slug__in=missing
+            ).values_list('slug', 'pk'))
+        unknown = missing - set(self.group_ids)
+        if unknown:
+            raise ValueError(f'Неизвестные сообщества: {sorted(unknown)}')
+        return self.group_ids
+
+    def load(self, kind, rows):
+        """Загружает строки вида kind и возвращает их количество."""
+        build = getattr(self, f'build_{kind}')
+        total = 0
+        with explicit_dates():
+            for batch in batches(rows, self.batch_size):
+                with transaction.atomic():
+                    objects = build(batch)
+                    if objects:
+                        type(objects[0]).objects.bulk_create(
+                            objects, ignore_conflicts=True
+                        )
+                total += len(batch)
+        return total
+
+    def build_groups(self, rows):
+        return [
+            Group(
+                slug=row['slug'],
+                title=row['title'],
+                description=row.get('description', '')
+            )
+            for row in rows
+        ]
+
+    def build_posts(self, rows):
+        users = self.users(row['author'] for row in rows)
+        groups = self.groups(row['group'] for row in rows if row.get('group'))
+        posts = []
+        for row in rows:
+            pub_date = parse_date(row.get('pub_date'))
+            group_id = groups[row['group']] if row.get('group') else None
+            posts.append(Post(
+                pk=row.get('id') or None,
+                text=row['text'],
+                author_id=users[row['author']],
+                group_id=group_id,
+                image=row.get('image') or '',
+                pub_date=pub_date,
+                updated=pub_date
+            ))
+            self.touched_authors.add(users[row['author']])
+            if group_id is not None:
+                self.touched_groups.add(group_id)
+        return posts
+
+    def build_comments(self, rows):
+        users = self.users(row['author'] for row in rows)
+        return [
+            Comment(
+                post_id=row['post'],
+                author_id=users[row['author']],
+                text=row['text'],
+                created=parse_date(row.get('created'))
+            )
+            for row in rows
+        ]
+
+    def build_follows(self, rows):
+        users = self.users(
+            name for row in rows for name in (row['user'], row['author'])
+        )
+        follows = [
+            Follow(user_id=users[row['user']], author_id=users[row['author']])
+            for row in rows if row['user'] != row['author']
+        ]
+        self.touched_authors.update(
+            user_id for follow in follows
+            for user_id in (follow.author_id, follow.user_id)
+        )
+        self.touched_followers.update(follow.user_id for follow in follows)
+        return follows
+
+    def touch_all(self):
+        """Помечает затронутыми все сообщества и всех пользователей."""
+        self.touched_groups.update(
+            Group.objects.values_list('pk', flat=True)
+        )
+        user_ids = User.objects.values_list('pk', flat=True)
+        self.touched_authors.update(user_ids)
+        self.touched_followers.update(user_ids)
+
+    def rebuild(self):
+        """Пересчитывает данные, которые при загрузке не обновлялись."""
+        counters.reconcile()
+        feed.rebuild()
+        search.install()
+        search.rebuild()
+        caching.bump(caching.INDEX)
+        caching.bump(caching.CARDS)
+        for group_id in self.touched_groups:
+            caching.bump(caching.group_scope(group_id))
+        for author_id in self.touched_authors:
+            caching.bump(caching.author_scope(author_id))
+        following.invalidate(*self.touched_followers)
@@ -0,0 +1,45 @@
+"""Объекты страниц, общие для валидаторов ETag и представлений.
+
+Валидатор ETag вызывается до представления и ищет тот же объект,
+поэтому найденный объект запоминается в запросе и второй раз из базы
+не читается. Объект загружается сразу со всем, что нужно странице.
+"""
+from .models import Group, Post, User
+
+
+def memoized(request, key, load):
+    objects = request.__dict__.setdefault('_posts_lookups', {})
+    if key not in objects:
+        objects[key] = load()
+    return objects[key]
+
+
+def group(request, slug):
+    """Сообщество по slug или None."""
+    return memoized(
+        request,
+        ('group', slug),
+        lambda: Group.objects.filter(slug=slug).first()
+    )
+
+
+def author(request, username):
+    """Автор по username со счётчиками или None."""
+    return memoized(
+        request,
+        ('author', username),
+        lambda: User.objects.select_related('stats').filter(
+            username=username
+        ).first()
+    )
+
+
+def post(request, post_id):
+    """Запись с автором, его счётчиками и сообществом или None."""
+    return memoized(
+        request,
+        ('post', post_id),
+        lambda: Post.objects.select_related(
+            'author__stats', 'group'
+        ).filter(pk=post_id).first()
+    )
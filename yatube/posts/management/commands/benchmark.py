@@ -0,0 +1,190 @@
+import json
+import os
+import tempfile
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.testcases import LiveServerThread, _StaticFilesHandler
+from django.test.utils import (override_settings, setup_databases,
+                               teardown_databases)
+
+from posts import benchmark
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmark_baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон страниц posts на отдельной тестовой базе: '
+        'задержки, SQL-запросы и пропускная способность.'
+    )
+
+    def add_arguments(self, parser):
+        volumes = parser.add_argument_group('объём данных')
+        volumes.add_argument('--users', type=int, default=50)
+        volumes.add_argument('--groups', type=int, default=5)
+        volumes.add_argument('--posts', type=int, default=500)
+        volumes.add_argument('--comments', type=int, default=1000)
+        volumes.add_argument(
+            '--follows', type=int, default=10,
+            help='Подписок у каждого пользователя.'
+        )
+        volumes.add_argument(
+            '--images', type=float, default=0.1,
+            help='Доля записей с картинкой.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=20,
+            help='Запросов к каждому маршруту.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Количество параллельных клиентов.'
+        )
+        parser.add_argument(
+            '--server', action='store_true',
+            help='Отправлять запросы локальному WSGI-серверу по HTTP; '
+                 'при --concurrency больше 1 включается всегда.'
+        )
+        parser.add_argument(
+            '--route', action='append', dest='routes',
+            help='Имя маршрута, например posts:index; можно повторять.'
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--baseline', default=DEFAULT_BASELINE,
+            help='Файл базовой сводки для сравнения.'
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать сводку прогона в файл базовой сводки.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый рост задержек и падение пропускной способности.'
+        )
+        parser.add_argument(
+            '--min-delta', type=float, default=10,
+            help='Рост p50 в мс, меньше которого замедление не учитывается.'
+        )
+        parser.add_argument(
+            '--output', help='Записать сводку прогона в JSON-файл.'
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            summary = self.benchmark(directory, options)
+        self.report(summary)
+        if options['output']:
+            self.dump(summary, options['output'])
+        if options['save_baseline']:
+            self.dump(summary, options['baseline'])
+            self.stdout.write(f'Базовая сводка: {options["baseline"]}')
+            return
+        if not os.path.exists(options['baseline']):
+            return
+        with open(options['baseline'], encoding='utf-8') as baseline:
+            regressions = benchmark.compare(
+                summary,
+                json.load(baseline),
+                options['tolerance'],
+                options['min_delta']
+            )
+        if regressions:
+            raise CommandError('\n'.join(['Регрессии:', *regressions]))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def benchmark(self, directory, options):
+        """Прогоняет нагрузку на временной файловой тестовой базе.
+
+        База файловая, а не в памяти, чтобы потоки клиентов и сервера
+        работали со своими соединениями. Панель отладки отключается,
+        чтобы не искажать замеры.
+        """
+        for connection in connections.all():
+            if connection.vendor == 'sqlite':
+                connection.settings_dict['TEST']['NAME'] = os.path.join(
+                    directory, f'{connection.alias}.sqlite3'
+                )
+        overrides = override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            INTERNAL_IPS=[],
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            MEDIA_ROOT=directory,
+            TASKS_EAGER=False,
+            QUERY_BUDGET_ENABLED=True,
+        )
+        overrides.enable()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        server = None
+        try:
+            self.stdout.write('Наполнение базы...')
+            dataset = benchmark.seed(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows=options['follows'],
+                images=options['images'],
+                random_seed=options['seed'],
+            )
+            cache.clear()
+            server_url = None
+            if options['server'] or options['concurrency'] > 1:
+                server = LiveServerThread(
+                    'localhost', _StaticFilesHandler
+                )
+                server.daemon = True
+                server.start()
+                server.is_ready.wait()
+                if server.error:
+                    raise server.error
+                server_url = f'http://localhost:{server.port}'
+            self.stdout.write('Прогон...')
+            metrics = getattr(cache, 'metrics', dict)
+            before = Counter(metrics())
+            summary = benchmark.run(
+                dataset,
+                requests_per_route=options['requests'],
+                concurrency=options['concurrency'],
+                server_url=server_url,
+                random_seed=options['seed'],
+                routes=options['routes'],
+            )
+            summary['cache'] = dict(Counter(metrics()) - before)
+            return summary
+        finally:
+            if server is not None:
+                server.terminate()
+            connections.close_all()
+            teardown_databases(old_config, verbosity=0)
+            overrides.disable()
+
+    def report(self, summary):
+        columns = ('requests', 'errors', 'queries', 'max_queries') + tuple(
+            f'p{percent}' for percent in benchmark.PERCENTILES
+        )
+        self.stdout.write(
+            f'{"маршрут":<26}' + ''.join(f'{name:>12}' for name in columns)
+        )
+        for route, row in summary['routes'].items():
+            self.stdout.write(f'{route:<26}' + ''.join(
+                f'{str(row[name]):>12}' for name in columns
+            ))
+        self.stdout.write(
+            f'Запросов: {summary["requests"]} за {summary["elapsed"]} с, '
+            f'{summary["throughput"]} в секунду'
+        )
+        if summary.get('cache'):
+            self.stdout.write('Кеш: ' + ', '.join(
+                f'{name} {count}'
+                for name, count in sorted(summary['cache'].items())
+            ))
+
+    def dump(self, summary, path):
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(summary, output, ensure_ascii=False, indent=2)
+            output.write('\n')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рекомендации авторов для подписки. '
+            'Запускается периодически, например из cron.')
+
+    def handle(self, *args, **options):
+        written = suggestions.rebuild()
+        self.stdout.write(f'Записано рекомендаций: {written}')
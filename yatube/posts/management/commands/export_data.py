@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exporting
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает записи, комментарии или подписки в JSONL '
+        'или CSV, целиком или для одного автора или сообщества.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(exporting.EXPORTS))
+        parser.add_argument(
+            '--format', choices=list(exporting.FORMATS), default='jsonl'
+        )
+        parser.add_argument('--author', help='username автора.')
+        parser.add_argument('--group', help='slug сообщества.')
+        parser.add_argument(
+            '--output', help='Файл выгрузки; по умолчанию stdout.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help='Строк, читаемых из базы за раз.'
+        )
+
+    def handle(self, *args, **options):
+        filters = {'chunk_size': options['chunk_size']}
+        try:
+            if options['author']:
+                filters['author'] = User.objects.get(
+                    username=options['author']
+                )
+            if options['group']:
+                filters['group'] = Group.objects.get(slug=options['group'])
+        except (User.DoesNotExist, Group.DoesNotExist) as error:
+            raise CommandError(error)
+        if 'group' in filters and not exporting.GROUP_FILTERS[
+            options['kind']
+        ]:
+            raise CommandError('Подписки не выгружаются по сообществу')
+        lines = exporting.lines(
+            options['kind'], options['format'], **filters
+        )
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(
+            options['output'], 'w', encoding='utf-8', newline=''
+        ) as output:
+            output.writelines(lines)
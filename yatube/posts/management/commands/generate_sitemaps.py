@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Дописывает файлы sitemap записей, сообществ и профилей '
+        'новыми адресами и переписывает файлы, строки или даты изменения '
+        'которых изменились.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Построить все файлы заново.'
+        )
+        parser.add_argument(
+            '--base-url',
+            default=settings.SITEMAP_BASE_URL,
+            help='Адрес сайта, от которого строятся ссылки.'
+        )
+
+    def handle(self, *args, **options):
+        manifest = sitemaps.generate(
+            options['base_url'].rstrip('/'), full=options['full']
+        )
+        for name, shards in manifest.items():
+            total = sum(shard['count'] for shard in shards)
+            self.stdout.write(f'{name}: файлов {len(shards)}, адресов {total}')
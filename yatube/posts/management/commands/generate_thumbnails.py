@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def generate(post_id):
+    try:
+        thumbnails.generate(post_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры изображений записей, у которых их ещё нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать миниатюры всех записей с изображениями.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(thumbnail='')
+        post_ids = posts.values_list('pk', flat=True)
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            list(pool.map(generate, post_ids.iterator()))
+        self.stdout.write('Миниатюры созданы')
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts import importing, search
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает сообщества, записи, комментарии и подписки из JSONL '
+        'или CSV и пересчитывает счётчики, ленты и поисковый индекс.'
+    )
+
+    def add_arguments(self, parser):
+        for kind in importing.KINDS:
+            parser.add_argument(
+                f'--{kind}', action='append', default=[], metavar='PATH',
+                help=f'Файл {kind}; можно указать несколько раз.'
+            )
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='Формат файлов, если его нельзя понять по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Строк в одной транзакции.'
+        )
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать производные данные после загрузки.'
+        )
+
+    def handle(self, *args, **options):
+        importer = importing.Importer(options['batch_size'])
+        if not any(options[kind] for kind in importing.KINDS):
+            importer.touch_all()
+        search.drop_triggers()
+        try:
+            for kind in importing.KINDS:
+                for path in options[kind]:
+                    total = importer.load(
+                        kind, importing.read_rows(path, options['format'])
+                    )
+                    self.stdout.write(f'{path}: загружено строк {total}')
+        except (ValueError, KeyError, IntegrityError) as error:
+            raise CommandError(
+                f'Загрузка прервана: {error!r}. Загруженные пачки '
+                'сохранены; чтобы пересчитать производные данные, '
+                'выполните команду без файлов.'
+            )
+        finally:
+            search.install()
+        if options['no_rebuild']:
+            self.stdout.write(
+                'Производные данные не пересчитаны: выполните команду '
+                'без файлов'
+            )
+            return
+        importer.rebuild()
+        self.stdout.write('Счётчики, ленты и поисковый индекс пересчитаны')
+        self.stdout.write(
+            'Миниатюры новых изображений создаст команда generate_thumbnails'
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики записей и комментариев с данными в базе.'
+
+    def handle(self, *args, **options):
+        for name, fixed in counters.reconcile().items():
+            self.stdout.write(f'{name}: исправлено строк {fixed}')
@@ -0,0 +1,20 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import following
+
+
+class FollowedAuthorsMiddleware:
+    """Добавляет в запрос множество followed_ids авторов, на которых
+    подписан пользователь.
+
+    Множество читается из кеша при первом обращении.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.followed_ids = SimpleLazyObject(
+            lambda: following.followed_ids(request.user)
+        )
+        return self.get_response(request)
@@ -1,10 +1,15 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 
 LENGTH_TEXT = 15
 
+# Поля записи, прежние значения которых сравниваются при сохранении, и
+# отметка поля, отложенного при загрузке (only/defer).
+TRACKED_FIELDS = ('group_id', 'image')
+NOT_LOADED = object()
+
 
 class Post(models.Model):
     """Класс для создания записей."""
@@ -18,6 +23,10 @@ class Post(models.Model):
         verbose_name='Дата публикации',
         db_index=True
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -38,6 +47,17 @@ class Post(models.Model):
         blank=True,
         verbose_name='Изображение'
     )
+    thumbnail = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name='Адрес миниатюры'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
 
     class Meta:
         verbose_name = 'Запись'
@@ -47,6 +67,57 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:LENGTH_TEXT]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_group_id = NOT_LOADED
+        instance._loaded_image = NOT_LOADED
+        instance.remember_loaded(set(field_names))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        names = set(TRACKED_FIELDS) - self.get_deferred_fields()
+        if fields is not None:
+            names &= {self._meta.get_field(name).attname for name in fields}
+        self.remember_loaded(names)
+
+    def remember_loaded(self, names):
+        """Запоминает значения group_id и image, прочитанные из базы.
+
+        По ним save и сигналы узнают перенос записи в другое сообщество
+        и замену изображения.
+        """
+        if 'group_id' in names:
+            self._loaded_group_id = self.group_id
+        if 'image' in names:
+            self._loaded_image = self.image.name
+
+    def save(self, *args, **kwargs):
+        """Сохраняет запись вместе со счётчиками в одной транзакции.
+
+        При замене изображения старая миниатюра сбрасывается. Если поле
+        было отложено при загрузке, а затем присвоено, прежнее значение
+        читается из базы перед сравнением.
+        """
+        deferred = self.get_deferred_fields()
+        unknown = [
+            name for name in TRACKED_FIELDS
+            if name not in deferred
+            and getattr(self, f'_loaded_{name}', None) is NOT_LOADED
+        ]
+        if unknown:
+            loaded = Post.objects.filter(pk=self.pk).values(*unknown).first()
+            for name in unknown:
+                setattr(self, f'_loaded_{name}', (loaded or {}).get(name))
+        if 'image' not in deferred and self.image.name != getattr(
+            self, '_loaded_image', None
+        ):
+            self.thumbnail = ''
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self.remember_loaded(set(TRACKED_FIELDS) - deferred)
+
 
 class Group(models.Model):
     """Класс для создания сообществ."""
@@ -61,6 +132,11 @@ class Group(models.Model):
         verbose_name='адрес'
     )
     description = models.TextField(verbose_name='описание')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество записей'
+    )
 
     class Meta:
         verbose_name = 'Сообщество'
@@ -100,10 +176,21 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created'
+            ),
+        )
 
     def __str__(self):
         return self.text[:LENGTH_TEXT]
 
+    def save(self, *args, **kwargs):
+        """Сохраняет комментарий вместе со счётчиком в одной транзакции."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Follow(models.Model):
     """Класс для подписки на авторов."""
@@ -129,3 +216,134 @@ class Follow(models.Model):
         constraints = (models.UniqueConstraint(
             fields=['author', 'user'], name='unique_follow'
         ),)
+        indexes = (
+            models.Index(fields=['user', 'author'], name='follow_user_author'),
+        )
+
+
+class FeedItem(models.Model):
+    """Класс записи в ленте подписок пользователя.
+
+    Строки создаются при публикации записи для каждого подписчика автора,
+    поэтому чтение ленты сводится к выборке по индексу (user, pub_date).
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='запись'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='автор'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        ordering = ('-pub_date',)
+        constraints = (models.UniqueConstraint(
+            fields=['user', 'post'], name='unique_feed_item'
+        ),)
+        indexes = (
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_item_user_date'
+            ),
+            models.Index(
+                fields=['user', 'author'], name='feed_item_user_author'
+            ),
+        )
+
+
+class PulledAuthor(models.Model):
+    """Класс автора, записи которого не разносятся по лентам.
+
+    У таких авторов слишком много подписчиков, их записи подмешиваются
+    в ленту при чтении.
+    """
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='pulled_feed',
+        verbose_name='автор'
+    )
+
+    class Meta:
+        verbose_name = 'Автор без разноса записей'
+        verbose_name_plural = 'Авторы без разноса записей'
+
+
+class UserStats(models.Model):
+    """Класс счётчиков пользователя."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество записей'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписок'
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class Suggestion(models.Model):
+    """Класс рекомендации автора для подписки.
+
+    Строки пересчитывает команда build_suggestions, поэтому страница
+    показывает рекомендации одной выборкой по индексу (user, -score).
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+        verbose_name='читатель'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='автор'
+    )
+    score = models.FloatField(verbose_name='Оценка')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        ordering = ('-score',)
+        constraints = (models.UniqueConstraint(
+            fields=['user', 'author'], name='unique_suggestion'
+        ),)
+        indexes = (
+            models.Index(
+                fields=['user', '-score'], name='suggestion_user_score'
+            ),
+        )
@@ -0,0 +1,148 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+SEPARATOR = '|'
+
+
+def encode_cursor(direction, value, pk):
+    """Упаковывает позицию в ленте в непрозрачную строку.
+
+    value — дата или целое число.
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = SEPARATOR.join((direction, str(value), str(pk)))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse_value=parse_datetime):
+    """Распаковывает курсор, для некорректного значения возвращает None."""
+    if not cursor:
+        return None
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        direction, value, pk = raw.split(SEPARATOR)
+        value = parse_value(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or value is None:
+        return None
+    return direction, value, pk
+
+
+def item_value(item, name):
+    """Значение поля объекта модели или строки values()."""
+    if isinstance(item, dict):
+        return item[name]
+    return getattr(item, name)
+
+
+class CursorPaginator(Paginator):
+    """Паджинатор по ключу (дата, id).
+
+    Страница выбирается условием по ключу вместо OFFSET и не требует
+    COUNT(*), поэтому стоимость запроса не зависит от глубины страницы.
+    Работает и с queryset из values(), если в строки входят поля ключа.
+    """
+
+    is_cursor = True
+    parse_value = staticmethod(parse_datetime)
+
+    def __init__(self, object_list, per_page, field='pub_date',
+                 tiebreak='pk'):
+        self.field = field
+        self.tiebreak = tiebreak
+        super().__init__(
+            object_list.order_by(f'-{field}', f'-{tiebreak}'), per_page
+        )
+
+    def get_page(self, cursor):
+        """Возвращает страницу после (или перед) позицией курсора.
+
+        Некорректный курсор считается запросом первой страницы.
+        """
+        position = decode_cursor(cursor, self.parse_value)
+        if position is None:
+            items = self._fetch(NEXT, None)
+            return self._build_page(items, False, len(items) > self.per_page)
+        direction, value, key = position
+        items = self._fetch(direction, (value, key))
+        if direction == NEXT:
+            return self._build_page(items, True, len(items) > self.per_page)
+        return self._build_page(
+            items[:self.per_page][::-1], len(items) > self.per_page, True
+        )
+
+    def keyset(self, queryset, direction, position, tiebreak=None):
+        """Отбирает объекты, лежащие по направлению от позиции.
+
+        Для направления назад порядок сортировки обратный.
+        """
+        tiebreak = tiebreak or self.tiebreak
+        if position is None:
+            return queryset
+        value, key = position
+        if direction == NEXT:
+            return queryset.filter(
+                Q(**{f'{self.field}__lt': value})
+                | Q(**{self.field: value, f'{tiebreak}__lt': key})
+            )
+        return queryset.filter(
+            Q(**{f'{self.field}__gt': value})
+            | Q(**{self.field: value, f'{tiebreak}__gt': key})
+        ).order_by(self.field, tiebreak)
+
+    def _fetch(self, direction, position):
+        """Возвращает не больше per_page + 1 объектов от позиции."""
+        queryset = self.keyset(self.object_list, direction, position)
+        return list(queryset[:self.per_page + 1])
+
+    def _build_page(self, items, has_previous, has_next):
+        items = items[:self.per_page]
+        page = self._get_page(items, 1, self)
+        page.next_cursor = page.previous_cursor = None
+        if items and has_next:
+            page.next_cursor = self._cursor(NEXT, items[-1])
+        if items and has_previous:
+            page.previous_cursor = self._cursor(PREVIOUS, items[0])
+        return page
+
+    def _cursor(self, direction, item):
+        return encode_cursor(
+            direction,
+            item_value(item, self.field),
+            item_value(item, self.tiebreak)
+        )
+
+
+class KeyPaginator(CursorPaginator):
+    """Паджинатор по одному целочисленному ключу без повторов.
+
+    Подходит для списков, которые идут по составному индексу, например
+    подписчиков автора по user_id из индекса (author, user).
+    """
+
+    parse_value = staticmethod(int)
+
+    def __init__(self, object_list, per_page, field):
+        self.field = self.tiebreak = field
+        Paginator.__init__(self, object_list.order_by(f'-{field}'), per_page)
+
+    def keyset(self, queryset, direction, position, tiebreak=None):
+        if position is None:
+            return queryset
+        value, _ = position
+        if direction == NEXT:
+            return queryset.filter(**{f'{self.field}__lt': value})
+        return queryset.filter(
+            **{f'{self.field}__gt': value}
+        ).order_by(self.field)
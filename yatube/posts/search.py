@@ -0,0 +1,158 @@
+"""Полнотекстовый поиск по записям и комментариям.
+
+В SQLite тексты индексируются таблицами FTS5 с внешним содержимым,
+которые поддерживаются триггерами. На других СУБД поиск сводится
+к фильтру icontains.
+"""
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+INDEXES = {
+    'posts_post': 'posts_post_fts',
+    'posts_comment': 'posts_comment_fts',
+}
+
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5("
+    "text, content='{table}', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} "
+    "BEGIN INSERT INTO {index}(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} "
+    "BEGIN INSERT INTO {index}({index}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS {index}_update "
+    "AFTER UPDATE OF text ON {table} "
+    "BEGIN INSERT INTO {index}({index}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO {index}(rowid, text) VALUES (new.id, new.text); END",
+)
+
+POST_IDS_SQL = (
+    'SELECT rowid AS id, rank FROM posts_post_fts '
+    'WHERE posts_post_fts MATCH %s '
+    'UNION ALL '
+    'SELECT comment.post_id AS id, fts.rank '
+    'FROM posts_comment_fts AS fts '
+    'JOIN posts_comment AS comment ON comment.id = fts.rowid '
+    'WHERE posts_comment_fts MATCH %s'
+)
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def install():
+    """Создаёт индексы и триггеры, если их ещё нет."""
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        for table, index in INDEXES.items():
+            for sql in CREATE_SQL:
+                cursor.execute(sql.format(table=table, index=index))
+
+
+def drop_triggers():
+    """Удаляет триггеры, чтобы массовая загрузка не обновляла индексы.
+
+    После загрузки нужно вызвать install и rebuild.
+    """
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        for index in INDEXES.values():
+            for action in ('insert', 'delete', 'update'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {index}_{action}')
+
+
+def rebuild():
+    """Перестраивает индексы по текущему содержимому таблиц."""
+    if not is_supported():
+        return
+    install()
+    with connection.cursor() as cursor:
+        for index in INDEXES.values():
+            cursor.execute(
+                f"INSERT INTO {index}({index}) VALUES ('rebuild')"
+            )
+
+
+def match_expression(query):
+    """Превращает пользовательский запрос в выражение MATCH.
+
+    Каждое слово берётся в кавычки, поэтому синтаксис FTS5 в запросе
+    не интерпретируется, а слова ищутся по префиксу и все вместе.
+    """
+    words = query.split()
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""')) for word in words
+    )
+
+
+def filter_queryset(queryset, query):
+    """Оставляет в queryset строки, текст которых совпал с запросом."""
+    table = queryset.model._meta.db_table
+    if not is_supported() or table not in INDEXES:
+        return queryset.filter(text__icontains=query)
+    expression = match_expression(query)
+    if not expression:
+        return queryset
+    index = INDEXES[table]
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {index} WHERE {index} MATCH %s', (expression,)
+    ))
+
+
+class PostSearchResults:
+    """Записи, найденные по тексту записи или её комментариев.
+
+    Отсортированы по релевантности bm25 и нарезаются запросом к индексу,
+    поэтому подходят для Paginator.
+    """
+
+    def __init__(self, queryset, query):
+        self.queryset = queryset
+        self.query = query
+        self.expression = match_expression(query)
+
+    def count(self):
+        if not self.expression:
+            return 0
+        if not is_supported():
+            return self._fallback().count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(DISTINCT id) FROM ({POST_IDS_SQL})',
+                (self.expression, self.expression)
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        if not self.expression:
+            return []
+        if not is_supported():
+            return list(self._fallback()[item])
+        start = item.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM ({POST_IDS_SQL}) '
+                'GROUP BY id ORDER BY MIN(rank) LIMIT %s OFFSET %s',
+                (
+                    self.expression,
+                    self.expression,
+                    item.stop - start,
+                    start
+                )
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+    def _fallback(self):
+        return self.queryset.filter(text__icontains=self.query)
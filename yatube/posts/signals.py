@@ -0,0 +1,192 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, counters, feed, following, suggestions, tasks
+from .models import (NOT_LOADED, Comment, Follow, Group, Post, User,
+                     UserStats)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_index(sender, update_fields=None, **kwargs):
+    """Сбрасывает кеш главной страницы при изменении её данных.
+
+    Обновление времени входа пользователя на главную не влияет.
+    """
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    caching.bump(caching.INDEX)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+def invalidate_cards(sender, created=False, update_fields=None, **kwargs):
+    """Сбрасывает кеш карточек записей при изменении сообществ и авторов.
+
+    Изменения самой записи меняют ключ её карточки через поле updated.
+    """
+    if created:
+        return
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    caching.bump(caching.CARDS)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_scopes(sender, instance, **kwargs):
+    """Сбрасывает версии страниц автора и сообществ записи."""
+    caching.bump(caching.author_scope(instance.author_id))
+    group_ids = {
+        instance.group_id, getattr(instance, '_loaded_group_id', None)
+    }
+    for group_id in group_ids - {None, NOT_LOADED}:
+        caching.bump(caching.group_scope(group_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_scope(sender, instance, **kwargs):
+    """Сбрасывает версию страницы сообщества."""
+    caching.bump(caching.group_scope(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_scope(sender, instance, update_fields=None, **kwargs):
+    """Сбрасывает версию профиля при изменении автора."""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    caching.bump(caching.author_scope(instance.pk))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_scopes(sender, instance, **kwargs):
+    """Сбрасывает версии профилей автора и подписчика: у обоих
+    меняются счётчики и списки подписок."""
+    caching.bump(caching.author_scope(instance.author_id))
+    caching.bump(caching.author_scope(instance.user_id))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_post_scope(sender, instance, **kwargs):
+    """Сбрасывает версии комментариев записи и всех записей.
+
+    Счётчик комментариев не меняется при правке комментария и при
+    замене удалённого новым, поэтому ETag записи строится по версии.
+    Общая версия нужна спискам API, в которых есть comments_count.
+    """
+    caching.bump(caching.post_scope(instance.post_id))
+    caching.bump(caching.COMMENTS)
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, **kwargs):
+    """Заводит счётчики нового пользователя."""
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    """Разносит новую запись по лентам подписчиков после фиксации.
+
+    Если подписчиков не больше FEED_INLINE_FANOUT, запись разносится
+    сразу, чтобы они увидели её без ожидания обработчика очереди;
+    большая рассылка уходит в фоновую задачу.
+    """
+    if not created:
+        return
+
+    def dispatch():
+        followers = Follow.objects.filter(author_id=instance.author_id)
+        if followers.count() <= settings.FEED_INLINE_FANOUT:
+            feed.fan_out(instance)
+        else:
+            tasks.fan_out_post.delay(instance.pk)
+
+    transaction.on_commit(dispatch)
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnail(sender, instance, **kwargs):
+    """Ставит в очередь создание миниатюры нового изображения."""
+    if 'image' in instance.get_deferred_fields():
+        return
+    if instance.image and instance.image.name != getattr(
+        instance, '_loaded_image', None
+    ):
+        tasks.generate_thumbnail.delay(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    """Обновляет счётчики записей автора и сообщества."""
+    counters.post_saved(instance, created)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    """Уменьшает счётчики записей автора и сообщества."""
+    counters.post_deleted(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    """Увеличивает счётчик комментариев записи."""
+    if created:
+        counters.comment_changed(instance, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    """Уменьшает счётчик комментариев записи."""
+    counters.comment_changed(instance, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    """Увеличивает счётчики подписчиков автора и подписок подписчика."""
+    if created:
+        counters.follow_changed(instance, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    """Уменьшает счётчики подписчиков автора и подписок подписчика."""
+    counters.follow_changed(instance, -1)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_following(sender, instance, **kwargs):
+    """Сбрасывает кеш подписок подписчика."""
+    following.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, **kwargs):
+    """Добавляет записи автора в ленту нового подписчика."""
+    if created:
+        feed.backfill(instance.user, instance.author)
+
+
+@receiver(post_save, sender=Follow)
+def discard_suggestion(sender, instance, created, **kwargs):
+    """Убирает рекомендацию автора, на которого подписались."""
+    if created:
+        suggestions.discard(instance.user_id, [instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def prune_feed(sender, instance, **kwargs):
+    """Убирает записи автора из ленты отписавшегося пользователя."""
+    feed.prune(instance.user_id, instance.author_id)
@@ -0,0 +1,280 @@
+"""Статические файлы sitemap для записей, сообществ и профилей.
+
+Каждый раздел делится на файлы по SITEMAP_SHARD_SIZE адресов
+в порядке ключа: для записей (pub_date, id), для сообществ
+и профилей — id. Заполненный файл не переписывается, пока не
+изменились его строки, поэтому повторная генерация читает только
+строки после ключа последнего заполненного файла и переписывает хвост.
+
+Для каждого файла запоминаются число строк и сумма их id, для записей
+ещё и последнее время изменения. Если в диапазоне ключей файла они
+изменились — строки удалены, профиль отключён, запись загружена задним
+числом или отредактирована, — раздел переписывается начиная с этого
+файла. Ключи и сводки файлов хранятся в manifest.json рядом с файлами.
+"""
+import json
+import os
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, Max, Q, Sum
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Group, Post, User
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+MANIFEST = 'manifest.json'
+INDEX = 'sitemap.xml'
+
+
+class Section:
+    """Раздел sitemap: строки values_list, адрес и дата изменения строки."""
+
+    name = None
+    key = ('pk',)
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def fields(self):
+        return self.key
+
+    def location(self, row):
+        raise NotImplementedError
+
+    def lastmod(self, row):
+        return None
+
+    def rows(self, watermark):
+        """Строки после ключа watermark в порядке ключа."""
+        queryset = self.queryset().order_by(*self.key)
+        if watermark is not None:
+            queryset = queryset.filter(self.after(watermark))
+        return queryset.values_list(*self.fields()).iterator()
+
+    def aggregates(self):
+        return {'count': Count('pk'), 'checksum': Sum('pk')}
+
+    def fingerprint(self, lower, upper):
+        """Сводка строк в базе после ключа lower до ключа upper
+        включительно."""
+        queryset = self.queryset().filter(self.upto(upper))
+        if lower is not None:
+            queryset = queryset.filter(self.after(lower))
+        totals = queryset.aggregate(**self.aggregates())
+        return {**totals, 'checksum': totals['checksum'] or 0}
+
+    def summary(self, rows):
+        """Сводка записанных в файл строк, сравнимая с fingerprint."""
+        return {
+            'count': len(rows),
+            'checksum': sum(self.pk(row) for row in rows),
+        }
+
+    def after(self, watermark):
+        (pk,) = watermark
+        return Q(pk__gt=pk)
+
+    def upto(self, watermark):
+        (pk,) = watermark
+        return Q(pk__lte=pk)
+
+    def watermark(self, row):
+        return [row[0]]
+
+    def pk(self, row):
+        return row[0]
+
+
+class PostSection(Section):
+    name = 'posts'
+    key = ('pub_date', 'pk')
+
+    def queryset(self):
+        return Post.objects.all()
+
+    def fields(self):
+        return ('pub_date', 'pk', 'updated')
+
+    def location(self, row):
+        return reverse('posts:post_detail', args=(row[1],))
+
+    def lastmod(self, row):
+        return row[2]
+
+    def aggregates(self):
+        return {**super().aggregates(), 'modified': Max('updated')}
+
+    def fingerprint(self, lower, upper):
+        totals = super().fingerprint(lower, upper)
+        if totals['modified'] is not None:
+            totals['modified'] = totals['modified'].isoformat()
+        return totals
+
+    def summary(self, rows):
+        return {
+            **super().summary(rows),
+            'modified': max(row[2] for row in rows).isoformat(),
+        }
+
+    def after(self, watermark):
+        pub_date, pk = parse_datetime(watermark[0]), watermark[1]
+        return Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+
+    def upto(self, watermark):
+        pub_date, pk = parse_datetime(watermark[0]), watermark[1]
+        return Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lte=pk)
+
+    def watermark(self, row):
+        return [row[0].isoformat(), row[1]]
+
+    def pk(self, row):
+        return row[1]
+
+
+class GroupSection(Section):
+    name = 'groups'
+
+    def queryset(self):
+        return Group.objects.all()
+
+    def fields(self):
+        return ('pk', 'slug')
+
+    def location(self, row):
+        return reverse('posts:group_list', args=(row[1],))
+
+
+class ProfileSection(Section):
+    name = 'profiles'
+
+    def queryset(self):
+        return User.objects.filter(is_active=True)
+
+    def fields(self):
+        return ('pk', 'username')
+
+    def location(self, row):
+        return reverse('posts:profile', args=(row[1],))
+
+
+SECTIONS = (PostSection(), GroupSection(), ProfileSection())
+
+
+def write_atomic(path, chunks):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as output:
+        output.writelines(chunks)
+    os.replace(temporary, path)
+
+
+def w3c_date(value):
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def urlset(section, rows, base_url):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<urlset xmlns="{SITEMAP_NS}">\n'
+    for row in rows:
+        yield f'<url><loc>{escape(base_url + section.location(row))}</loc>'
+        lastmod = section.lastmod(row)
+        if lastmod is not None:
+            yield f'<lastmod>{w3c_date(lastmod)}</lastmod>'
+        yield '</url>\n'
+    yield '</urlset>\n'
+
+
+def sitemap_index(manifest, base_url):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    for section in SECTIONS:
+        for shard in manifest.get(section.name, []):
+            location = base_url + settings.SITEMAP_URL + shard['file']
+            yield (
+                f'<sitemap><loc>{escape(location)}</loc>'
+                f'<lastmod>{shard["written"]}</lastmod></sitemap>\n'
+            )
+    yield '</sitemapindex>\n'
+
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST), encoding='utf-8') as source:
+            return json.load(source)
+    except FileNotFoundError:
+        return {}
+
+
+def unchanged(section, shards):
+    """Сколько первых файлов раздела совпадает с данными в базе."""
+    lower = None
+    for number, shard in enumerate(shards):
+        fingerprint = section.fingerprint(lower, shard['last'])
+        if any(shard.get(name) != value
+               for name, value in fingerprint.items()):
+            return number
+        lower = shard['last']
+    return len(shards)
+
+
+def generate_section(section, shards, root, base_url, size):
+    """Дописывает раздел и возвращает обновлённый список файлов.
+
+    Первый изменившийся файл и все следующие, а также незаполненный
+    последний файл пересоздаются вместе с новыми.
+    """
+    shards = shards[:unchanged(section, shards)]
+    if shards and shards[-1]['count'] < size:
+        shards.pop()
+    watermark = shards[-1]['last'] if shards else None
+    rows = section.rows(watermark)
+    written = w3c_date(timezone.now())
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return shards
+        name = f'{section.name}-{len(shards) + 1}.xml'
+        write_atomic(
+            os.path.join(root, name), urlset(section, batch, base_url)
+        )
+        shards.append({
+            'file': name,
+            **section.summary(batch),
+            'last': section.watermark(batch[-1]),
+            'written': written,
+        })
+
+
+def generate(base_url, full=False):
+    """Обновляет файлы sitemap и индекс sitemap.xml.
+
+    При full все разделы строятся заново. Возвращает манифест.
+    """
+    root = settings.SITEMAP_ROOT
+    os.makedirs(root, exist_ok=True)
+    manifest = {} if full else load_manifest(root)
+    for section in SECTIONS:
+        manifest[section.name] = generate_section(
+            section,
+            manifest.get(section.name, []),
+            root,
+            base_url,
+            settings.SITEMAP_SHARD_SIZE
+        )
+    current = {INDEX, MANIFEST} | {
+        shard['file'] for shards in manifest.values() for shard in shards
+    }
+    for name in os.listdir(root):
+        if name.endswith('.xml') and name not in current:
+            os.remove(os.path.join(root, name))
+    write_atomic(
+        os.path.join(root, INDEX), sitemap_index(manifest, base_url)
+    )
+    write_atomic(
+        os.path.join(root, MANIFEST),
+        [json.dumps(manifest, ensure_ascii=False, indent=2)]
+    )
+    return manifest
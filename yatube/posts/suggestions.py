@@ -0,0 +1,148 @@
+"""Рекомендации авторов для подписки.
+
+rebuild пересчитывает таблицу Suggestion пакетно: граф подписок и
+сообщества, в которые пишут авторы, читаются из базы один раз, оценки
+кандидатов считаются в памяти, и каждому пользователю записываются
+лучшие SUGGESTIONS_PER_USER авторов. Страница подписок читает готовые
+строки одной выборкой по индексу, а не обходит граф.
+
+Оценка складывается из трёх сигналов с весами SUGGESTION_WEIGHTS:
+
+- friends — на кандидата подписаны авторы, на которых подписан
+  пользователь;
+- cofollow — на кандидата подписаны читатели с похожими подписками,
+  вклад каждого равен косинусной близости их подписок;
+- groups — кандидат пишет в сообщества, в которые пишут пользователь
+  или авторы его подписок.
+
+Читатели авторов, у которых подписчиков больше SUGGESTION_COFOLLOW_LIMIT,
+при поиске похожих не перебираются: общий популярный автор мало
+говорит о сходстве, а обходить его подписчиков дороже всего.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Follow, Post, Suggestion, User
+
+
+class Graph:
+    """Подписки и сообщества авторов, загруженные в память."""
+
+    def __init__(self):
+        self.following = defaultdict(set)
+        self.followers = defaultdict(set)
+        for user_id, author_id in Follow.objects.values_list(
+            'user_id', 'author_id'
+        ).iterator():
+            self.following[user_id].add(author_id)
+            self.followers[author_id].add(user_id)
+        self.groups = defaultdict(set)
+        self.members = defaultdict(set)
+        for author_id, group_id in Post.objects.filter(
+            group__isnull=False
+        ).order_by().values_list('author_id', 'group_id').distinct(
+        ).iterator():
+            self.groups[author_id].add(group_id)
+            self.members[group_id].add(author_id)
+
+
+def friends(followed, graph, scores, weight):
+    for author_id in followed:
+        for candidate in graph.following.get(author_id, ()):
+            scores[candidate] += weight
+
+
+def cofollow(user_id, followed, graph, scores, weight):
+    common = Counter()
+    for author_id in followed:
+        readers = graph.followers.get(author_id, ())
+        if len(readers) <= settings.SUGGESTION_COFOLLOW_LIMIT:
+            common.update(readers)
+    common.pop(user_id, None)
+    for reader, shared in common.items():
+        authors = graph.following[reader]
+        similarity = shared / math.sqrt(len(followed) * len(authors))
+        for candidate in authors:
+            scores[candidate] += weight * similarity
+
+
+def groups(user_id, followed, graph, scores, weight):
+    group_ids = set(graph.groups.get(user_id, ()))
+    for author_id in followed:
+        group_ids.update(graph.groups.get(author_id, ()))
+    for group_id in group_ids:
+        for candidate in graph.members[group_id]:
+            scores[candidate] += weight
+
+
+def score(user_id, graph):
+    """Оценки всех кандидатов для пользователя."""
+    weights = settings.SUGGESTION_WEIGHTS
+    followed = graph.following.get(user_id, set())
+    scores = Counter()
+    friends(followed, graph, scores, weights['friends'])
+    cofollow(user_id, followed, graph, scores, weights['cofollow'])
+    groups(user_id, followed, graph, scores, weights['groups'])
+    for excluded in (user_id, *followed):
+        scores.pop(excluded, None)
+    return scores
+
+
+def top(user_id, graph):
+    """Лучшие SUGGESTIONS_PER_USER кандидатов: пары (id, оценка)."""
+    return heapq.nlargest(
+        settings.SUGGESTIONS_PER_USER,
+        score(user_id, graph).items(),
+        key=itemgetter(1)
+    )
+
+
+def rebuild():
+    """Пересчитывает рекомендации всех пользователей.
+
+    Строки пользователей заменяются пачками по SUGGESTIONS_BATCH_SIZE
+    в отдельных транзакциях. Возвращает число записанных строк.
+    """
+    graph = Graph()
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    size = settings.SUGGESTIONS_BATCH_SIZE
+    written = 0
+    for start in range(0, len(user_ids), size):
+        batch = user_ids[start:start + size]
+        rows = [
+            Suggestion(user_id=user_id, author_id=author_id, score=value)
+            for user_id in batch
+            for author_id, value in top(user_id, graph)
+        ]
+        with transaction.atomic():
+            Suggestion.objects.filter(user_id__in=batch).delete()
+            Suggestion.objects.bulk_create(rows)
+        written += len(rows)
+    return written
+
+
+def discard(user_id, author_ids):
+    """Убирает рекомендации авторов, на которых пользователь подписался."""
+    Suggestion.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).delete()
+
+
+def for_request(request):
+    """Рекомендации для страницы: авторы по убыванию оценки.
+
+    Подписки, появившиеся после пересчёта, отбрасываются по
+    request.followed_ids.
+    """
+    suggestions = request.user.suggestions.select_related('author')[
+        :settings.SUGGESTIONS_SHOWN
+    ]
+    return [
+        suggestion.author for suggestion in suggestions
+        if suggestion.author_id not in request.followed_ids
+    ]
@@ -0,0 +1,24 @@
+from core.tasks import task
+
+from . import caching, feed, thumbnails
+from .models import Post
+
+
+@task
+def generate_thumbnail(post_id):
+    """Фоновая задача создания миниатюры записи."""
+    thumbnails.generate(post_id)
+
+
+@task
+def fan_out_post(post_id):
+    """Фоновая задача разноса новой записи по лентам подписчиков."""
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    if post is not None:
+        feed.fan_out(post)
+
+
+@task
+def renew_version(scope):
+    """Фоновая задача повторного сброса версии кеша после догона реплик."""
+    caching.renew_after_lag(scope)
@@ -0,0 +1,10 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def followed_by(author, request):
+    """Подписан ли пользователь запроса на автора:
+    {% if author|followed_by:request %}."""
+    return author.pk in request.followed_ids
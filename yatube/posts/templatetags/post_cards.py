@@ -0,0 +1,47 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts import caching
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_content.html'
+
+
+def card_key(post, show_author, show_group, version):
+    """Ключ карточки: версия, запись, время её изменения и вариант."""
+    return 'posts:card:{}:{}:{}:{:d}{:d}'.format(
+        version,
+        post.pk,
+        int(post.updated.timestamp() * 1_000_000),
+        bool(show_author),
+        bool(show_group),
+    )
+
+
+@register.simple_tag
+def post_cards(posts, show_author=True, show_group=True):
+    """Возвращает список отрисованных карточек записей страницы.
+
+    Готовые карточки читаются из кеша одним get_many, недостающие
+    отрисовываются и сохраняются одним set_many.
+    """
+    posts = list(posts)
+    version = caching.version(caching.CARDS)
+    keys = [card_key(post, show_author, show_group, version) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {}
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            missing[key] = render_to_string(CARD_TEMPLATE, {
+                'post': post,
+                'show_author': show_author,
+                'show_group': show_group,
+            })
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import benchmark, urls
+from ..models import Follow, Post
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True)
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.dataset = benchmark.seed(
+            users=5, groups=2, posts=20, comments=10, follows=2, images=0,
+            random_seed=1
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_seed(self):
+        """seed создаёт заданный объём данных."""
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertEqual(Follow.objects.count(), 10)
+
+    def test_run_covers_all_routes(self):
+        """Прогон обходит все маршруты posts и считает запросы."""
+        summary = benchmark.run(
+            self.dataset, requests_per_route=2, concurrency=1, random_seed=1
+        )
+        routes = benchmark.scenarios(self.dataset, None, None)
+        self.assertEqual(set(summary['routes']), set(routes))
+        self.assertEqual(set(routes), {
+            f'posts:{pattern.name}' for pattern in urls.urlpatterns
+        })
+        for route, row in summary['routes'].items():
+            with self.subTest(route=route):
+                self.assertEqual(row['requests'], 2)
+                self.assertEqual(row['errors'], 0)
+                self.assertGreater(row['queries'], 0)
+
+    def test_concurrent_run_requires_server(self):
+        """Параллельный прогон тестовым клиентом не запускается."""
+        with self.assertRaises(ValueError):
+            benchmark.run(self.dataset, requests_per_route=1, concurrency=2)
+
+    def test_compare(self):
+        """compare находит рост запросов, задержки и ошибок
+        и пропускает выброс одного p95."""
+        row = {
+            'requests': 10, 'errors': 0, 'queries': 3, 'max_queries': 3,
+            'p50': 10, 'p90': 10, 'p95': 10, 'p99': 10,
+        }
+        baseline = {'throughput': 100, 'routes': {'posts:index': row}}
+        self.assertEqual(benchmark.compare(baseline, baseline), [])
+        slower = {
+            'throughput': 50,
+            'routes': {'posts:index': {
+                **row, 'errors': 1, 'max_queries': 4, 'p50': 30, 'p95': 30,
+            }},
+        }
+        self.assertEqual(len(benchmark.compare(slower, baseline)), 4)
+        spike = {
+            'throughput': 100,
+            'routes': {'posts:index': {**row, 'p95': 30}},
+        }
+        self.assertEqual(benchmark.compare(spike, baseline), [])
@@ -0,0 +1,126 @@
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import commit_callbacks
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class SyndicationFeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Запись для ленты', group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', args=(cls.group.slug,)),
+            reverse('posts:group_atom', args=(cls.group.slug,)),
+            reverse('posts:profile_rss', args=(cls.author.username,)),
+            reverse('posts:profile_atom', args=(cls.author.username,)),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feeds_contain_posts(self):
+        """Проверяем, что ленты отдают XML с записями."""
+        for url in SyndicationFeedsTests.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn('xml', response['Content-Type'])
+                self.assertContains(response, 'Запись для ленты')
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_feeds_are_cached(self):
+        """Проверяем, что повторный запрос ленты не строит её заново."""
+        for url in SyndicationFeedsTests.urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    self.guest_client.get(url)
+                self.assertLessEqual(len(queries), 1)
+
+    def test_feeds_revalidate(self):
+        """Проверяем ответ 304 на условные запросы."""
+        for url in SyndicationFeedsTests.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                for headers in (
+                    {'HTTP_IF_NONE_MATCH': response['ETag']},
+                    {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+                ):
+                    self.assertEqual(
+                        self.guest_client.get(url, **headers).status_code,
+                        HTTPStatus.NOT_MODIFIED
+                    )
+
+    def test_new_post_resets_feeds(self):
+        """Проверяем, что новая запись появляется во всех лентах."""
+        etags = {
+            url: self.guest_client.get(url)['ETag']
+            for url in SyndicationFeedsTests.urls
+        }
+        with commit_callbacks():
+            Post.objects.create(
+                author=SyndicationFeedsTests.author,
+                text='Свежая запись',
+                group=SyndicationFeedsTests.group
+            )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Свежая запись')
+
+    def test_deleted_post_changes_last_modified(self):
+        """Проверяем, что после удаления записи лента не отдаёт 304
+        по If-Modified-Since."""
+        newest = Post.objects.create(
+            author=SyndicationFeedsTests.author,
+            text='Удаляемая запись',
+            group=SyndicationFeedsTests.group
+        )
+        modified = {
+            url: self.guest_client.get(url)['Last-Modified']
+            for url in SyndicationFeedsTests.urls
+        }
+        with commit_callbacks():
+            newest.delete()
+        later = timezone.now() + timedelta(minutes=1)
+        with mock.patch('posts.feeds.timezone.now', return_value=later):
+            for url, last_modified in modified.items():
+                with self.subTest(url=url):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_MODIFIED_SINCE=last_modified
+                    )
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+                    self.assertNotContains(response, 'Удаляемая запись')
+
+    def test_unknown_scope(self):
+        """Проверяем, что лента несуществующего сообщества отдаёт 404."""
+        response = self.guest_client.get(
+            reverse('posts:group_rss', args=('missing',))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
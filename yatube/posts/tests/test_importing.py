@@ -0,0 +1,112 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .. import search
+from ..models import Comment, FeedItem, Follow, Group, Post, User
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ImportDataTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def write(self, name, content):
+        path = os.path.join(TEMP_DIR, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        return path
+
+    def write_jsonl(self, name, rows):
+        return self.write(
+            name, ''.join(json.dumps(row) + '\n' for row in rows)
+        )
+
+    def test_import(self):
+        """Команда загружает данные и пересчитывает производные."""
+        groups = self.write(
+            'groups.csv',
+            'slug,title,description\nbooks,Книги,О книгах\n'
+        )
+        posts = self.write_jsonl('posts.jsonl', [
+            {
+                'id': 100, 'text': 'Первая запись', 'author': 'leo',
+                'group': 'books', 'pub_date': '2020-01-01T10:00:00',
+            },
+            {'id': 101, 'text': 'Вторая запись', 'author': 'leo'},
+        ])
+        comments = self.write_jsonl('comments.jsonl', [
+            {'post': 100, 'author': 'anna', 'text': 'Отличная запись'},
+        ])
+        follows = self.write(
+            'follows.csv', 'user,author\nanna,leo\nleo,leo\n'
+        )
+        call_command(
+            'import_data',
+            groups=[groups],
+            posts=[posts],
+            comments=[comments],
+            follows=[follows],
+            batch_size=1,
+            stdout=StringIO()
+        )
+        leo = User.objects.get(username='leo')
+        anna = User.objects.get(username='anna')
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.group, Group.objects.get(slug='books'))
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(leo.stats.posts_count, 2)
+        self.assertEqual(post.group.posts_count, 1)
+        self.assertEqual(Comment.objects.get().author, anna)
+        self.assertEqual(Follow.objects.get().user, anna)
+        self.assertEqual(
+            FeedItem.objects.filter(user=anna).count(), 2
+        )
+        self.assertFalse(leo.has_usable_password())
+        if search.is_supported():
+            self.assertEqual(
+                list(search.filter_queryset(Post.objects, 'Отличная')), []
+            )
+            self.assertEqual(
+                list(search.filter_queryset(Post.objects, 'Первая')), [post]
+            )
+            new_post = Post.objects.create(author=leo, text='Новая запись')
+            self.assertEqual(
+                list(search.filter_queryset(Post.objects, 'Новая')),
+                [new_post]
+            )
+
+    def test_export_round_trip(self):
+        """Выгрузка export_data загружается обратно import_data."""
+        author = User.objects.create_user(username='leo')
+        Post.objects.create(author=author, text='Запись для выгрузки')
+        path = os.path.join(TEMP_DIR, 'export.csv')
+        call_command(
+            'export_data', 'posts', format='csv', author='leo', output=path
+        )
+        exported = list(Post.objects.values_list('pk', 'text', 'pub_date'))
+        Post.objects.all().delete()
+        call_command('import_data', posts=[path], stdout=StringIO())
+        self.assertEqual(
+            list(Post.objects.values_list('pk', 'text', 'pub_date')),
+            exported
+        )
+
+    def test_unknown_group(self):
+        """Запись с неизвестным сообществом прерывает загрузку."""
+        posts = self.write_jsonl('unknown.jsonl', [
+            {'text': 'Запись', 'author': 'leo', 'group': 'missing'},
+        ])
+        with self.assertRaises(CommandError):
+            call_command('import_data', posts=[posts], stdout=StringIO())
+        self.assertFalse(Post.objects.exists())
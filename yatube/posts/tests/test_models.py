@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post, UserStats
 
 User = get_user_model()
 
@@ -83,3 +86,110 @@ class PostModelTest(TestCase):
                     post._meta.get_field(value).help_text,
                     expected
                 )
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.group2 = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test2',
+            description='Тестовое описание 2',
+        )
+
+    def counts(self, post):
+        """Возвращает текущие значения счётчиков из базы."""
+        return (
+            UserStats.objects.get(user=CountersTest.author).posts_count,
+            Group.objects.get(pk=CountersTest.group.pk).posts_count,
+            Group.objects.get(pk=CountersTest.group2.pk).posts_count,
+            Post.objects.get(pk=post.pk).comments_count,
+        )
+
+    def test_counters_follow_changes(self):
+        """Проверяем, что счётчики обновляются при создании,
+        переносе и удалении записей и комментариев."""
+        post = Post.objects.create(
+            author=CountersTest.author,
+            text='Тестовая запись',
+            group=CountersTest.group
+        )
+        comment = Comment.objects.create(
+            post=post, author=CountersTest.author, text='Комментарий'
+        )
+        self.assertEqual(self.counts(post), (1, 1, 0, 1))
+        post = Post.objects.get(pk=post.pk)
+        post.group = CountersTest.group2
+        post.save()
+        self.assertEqual(self.counts(post), (1, 0, 1, 1))
+        comment.delete()
+        self.assertEqual(self.counts(post), (1, 0, 1, 0))
+        post.delete()
+        self.assertEqual(
+            UserStats.objects.get(user=CountersTest.author).posts_count, 0
+        )
+        self.assertEqual(
+            Group.objects.get(pk=CountersTest.group2.pk).posts_count, 0
+        )
+
+    def test_saving_deferred_post_keeps_counters(self):
+        """Проверяем, что сохранение записи с отложенными полями
+        не меняет счётчики и не сбрасывает миниатюру."""
+        post = Post.objects.create(
+            author=CountersTest.author,
+            text='Тестовая запись',
+            group=CountersTest.group,
+            image='posts/small.gif'
+        )
+        Post.objects.filter(pk=post.pk).update(thumbnail='cache/small.jpg')
+        deferred = Post.objects.only('text').get(pk=post.pk)
+        deferred.text = 'Исправленная запись'
+        deferred.save()
+        self.assertEqual(self.counts(post), (1, 1, 0, 0))
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).thumbnail, 'cache/small.jpg'
+        )
+        deferred = Post.objects.only('text').get(pk=post.pk)
+        deferred.group = CountersTest.group2
+        deferred.save()
+        self.assertEqual(self.counts(post), (1, 0, 1, 0))
+
+    def follow_counts(self, user):
+        stats = UserStats.objects.get(user=user)
+        return stats.followers_count, stats.following_count
+
+    def test_follow_counters(self):
+        """Проверяем, что счётчики подписчиков и подписок обновляются
+        при подписке и отписке и исправляются сверкой."""
+        reader = User.objects.create_user(username='reader')
+        follow = Follow.objects.create(user=reader, author=CountersTest.author)
+        self.assertEqual(self.follow_counts(CountersTest.author), (1, 0))
+        self.assertEqual(self.follow_counts(reader), (0, 1))
+        UserStats.objects.update(followers_count=7, following_count=7)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.follow_counts(CountersTest.author), (1, 0))
+        self.assertEqual(self.follow_counts(reader), (0, 1))
+        follow.delete()
+        self.assertEqual(self.follow_counts(CountersTest.author), (0, 0))
+        self.assertEqual(self.follow_counts(reader), (0, 0))
+
+    def test_reconcile_counters_fixes_drift(self):
+        """Проверяем, что команда reconcile_counters исправляет
+        разошедшиеся счётчики."""
+        post = Post.objects.create(
+            author=CountersTest.author,
+            text='Тестовая запись',
+            group=CountersTest.group
+        )
+        UserStats.objects.update(posts_count=5)
+        Group.objects.update(posts_count=3)
+        Post.objects.update(comments_count=2)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.counts(post), (1, 1, 0, 0))
@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.queries import QueryRecorder
+from core.testing import QueryBudgetMixin
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+AUTHORS_COUNT = 5
+POSTS_PER_AUTHOR = 3
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Страницы укладываются в бюджет запросов и не делают N+1."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(AUTHORS_COUNT)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+            for number in range(POSTS_PER_AUTHOR):
+                Post.objects.create(
+                    author=author,
+                    text=f'Тестовый пост {number}',
+                    group=cls.group
+                )
+        cls.post = Post.objects.latest('pub_date')
+        for author in cls.authors:
+            Comment.objects.create(
+                post=cls.post, author=author, text='Комментарий'
+            )
+
+        cls.URLS = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse(
+                'posts:profile',
+                kwargs={'username': cls.authors[0].username}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+            reverse('posts:post_comments', kwargs={'post_id': cls.post.pk}),
+            reverse(
+                'posts:profile_followers',
+                kwargs={'username': cls.authors[0].username}
+            ),
+            reverse(
+                'posts:profile_following',
+                kwargs={'username': cls.user.username}
+            ),
+            reverse('posts:follow_index'),
+            reverse('posts:search'),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_pages_within_budget(self):
+        """Страницы без кеша укладываются в бюджет запросов."""
+        for url in self.URLS:
+            with self.subTest(url=url):
+                self.get_within_budget(self.client, url, {'q': 'пост'})
+
+    def test_pages_within_budget_by_page_number(self):
+        """Постраничный режим укладывается в бюджет запросов."""
+        for url in self.URLS:
+            with self.subTest(url=url):
+                self.get_within_budget(
+                    self.client, url, {'q': 'пост', 'page': 2}
+                )
+
+    def test_recorder_detects_repeated_queries(self):
+        """Повторяющиеся запросы распознаются как N+1."""
+        recorder = QueryRecorder()
+        with recorder.record():
+            for post in Post.objects.all():
+                post.author.username
+        self.assertTrue(recorder.repeated())
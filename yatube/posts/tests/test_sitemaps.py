@@ -0,0 +1,169 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import sitemaps
+from ..models import Group, Post
+
+User = get_user_model()
+
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    SITEMAP_ROOT=TEMP_SITEMAP_ROOT,
+    SITEMAP_BASE_URL='https://yatube.test',
+    SITEMAP_SHARD_SIZE=2
+)
+class SitemapsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def create_posts(self, count):
+        return [
+            Post.objects.create(author=SitemapsTests.author, text='Запись')
+            for _ in range(count)
+        ]
+
+    def read(self, name):
+        with open(
+            os.path.join(TEMP_SITEMAP_ROOT, name), encoding='utf-8'
+        ) as sitemap:
+            return sitemap.read()
+
+    def generate(self, **options):
+        call_command('generate_sitemaps', stdout=StringIO(), **options)
+
+    def test_sections_are_sharded(self):
+        """Разделы делятся на файлы и перечислены в индексе."""
+        posts = self.create_posts(3)
+        self.generate()
+        index = self.read('sitemap.xml')
+        for name in ('posts-1.xml', 'posts-2.xml', 'groups-1.xml',
+                     'profiles-1.xml'):
+            with self.subTest(name=name):
+                self.assertIn(
+                    f'https://yatube.test/media/sitemaps/{name}', index
+                )
+        self.assertIn(
+            'https://yatube.test' + reverse(
+                'posts:post_detail', args=(posts[2].pk,)
+            ),
+            self.read('posts-2.xml')
+        )
+        self.assertIn(
+            'https://yatube.test' + reverse(
+                'posts:group_list', args=('test',)
+            ),
+            self.read('groups-1.xml')
+        )
+
+    def test_generation_is_incremental(self):
+        """Заполненные файлы не перезаписываются, хвост дописывается."""
+        self.create_posts(3)
+        self.generate()
+        full_shard = os.path.join(TEMP_SITEMAP_ROOT, 'posts-1.xml')
+        os.utime(full_shard, (0, 0))
+        new_posts = self.create_posts(2)
+        self.generate()
+        self.assertEqual(os.stat(full_shard).st_mtime, 0)
+        self.assertEqual(self.read('posts-2.xml').count('<url>'), 2)
+        self.assertIn(
+            reverse('posts:post_detail', args=(new_posts[1].pk,)),
+            self.read('posts-3.xml')
+        )
+
+    def test_deleted_rows_are_removed(self):
+        """Удалённые записи и отключённые профили убираются из файлов
+        без полной перестройки."""
+        posts = self.create_posts(3)
+        reader = User.objects.create_user(username='reader')
+        deleted_url = reverse('posts:post_detail', args=(posts[0].pk,))
+        self.generate()
+        posts[0].delete()
+        reader.is_active = False
+        reader.save()
+        self.generate()
+        self.assertNotIn(deleted_url, self.read('posts-1.xml'))
+        self.assertEqual(self.read('posts-1.xml').count('<url>'), 2)
+        self.assertFalse(
+            os.path.exists(os.path.join(TEMP_SITEMAP_ROOT, 'posts-2.xml'))
+        )
+        self.assertNotIn(
+            reverse('posts:profile', args=('reader',)),
+            self.read('profiles-1.xml')
+        )
+
+    def test_backdated_rows_are_added(self):
+        """Запись, загруженная задним числом, попадает в свой файл,
+        а следующие файлы переписываются."""
+        posts = self.create_posts(4)
+        self.generate()
+        backdated = self.create_posts(1)[0]
+        Post.objects.filter(pk=backdated.pk).update(
+            pub_date=posts[0].pub_date - timedelta(days=1)
+        )
+        self.generate()
+        self.assertIn(
+            reverse('posts:post_detail', args=(backdated.pk,)),
+            self.read('posts-1.xml')
+        )
+        self.assertEqual(
+            [self.read(f'posts-{number}.xml').count('<url>')
+             for number in (1, 2, 3)],
+            [2, 2, 1]
+        )
+
+    def test_edited_rows_update_lastmod(self):
+        """Правка записи переписывает её файл с новой датой изменения,
+        остальные заполненные файлы не трогаются."""
+        posts = self.create_posts(4)
+        self.generate()
+        untouched = os.path.join(TEMP_SITEMAP_ROOT, 'posts-1.xml')
+        os.utime(untouched, (0, 0))
+        updated = posts[3].updated + timedelta(hours=1)
+        Post.objects.filter(pk=posts[3].pk).update(updated=updated)
+        self.generate()
+        self.assertEqual(os.stat(untouched).st_mtime, 0)
+        self.assertIn(sitemaps.w3c_date(updated), self.read('posts-2.xml'))
+
+    def test_full_rebuild_drops_stale_files(self):
+        """Полная перестройка удаляет лишние файлы."""
+        posts = self.create_posts(3)
+        self.generate()
+        Post.objects.filter(pk__in=[post.pk for post in posts]).delete()
+        self.generate(full=True)
+        self.assertFalse(
+            os.path.exists(os.path.join(TEMP_SITEMAP_ROOT, 'posts-1.xml'))
+        )
+        self.assertNotIn('posts-', self.read('sitemap.xml'))
+
+    def test_robots_points_to_sitemap(self):
+        """robots.txt указывает на индекс sitemap."""
+        response = self.client.get('/robots.txt')
+        self.assertContains(
+            response, 'Sitemap: http://localhost:8000/media/sitemaps/'
+        )
@@ -1,16 +1,25 @@
+import json
 import shutil
 import tempfile
 from http import HTTPStatus
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.template import Context, Template
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Comment, Follow, Group, Post
+from core.testing import commit_callbacks
+
+from .. import caching, feed, suggestions, tasks, thumbnails
+from ..models import (Comment, FeedItem, Follow, Group, Post, PulledAuthor,
+                      Suggestion, UserStats)
 
 User = get_user_model()
 
@@ -163,7 +172,7 @@ class PostViewsTests(TestCase):
         self.assertIsInstance(comment, Comment)
         self.assertEqual(comment.author, user)
         self.assertEqual(comment.post, PostViewsTests.post)
-        self.assertEqual(response.context['comments'].count(), 1)
+        self.assertEqual(len(response.context['comments']), 1)
         field = response.context['form'].fields['text']
         self.assertIsInstance(field, forms.fields.CharField)
 
@@ -214,27 +223,89 @@ class PostViewsTests(TestCase):
 
     def test_index_cache(self):
         """Проверяем, что кеширование главной страницы работает."""
-        new_post = Post.objects.create(
-            text='Комментарий проверки кэша',
-            author=PostViewsTests.author,
-            group=PostViewsTests.group
-        )
+        cache.clear()
         current_content = PostViewsTests.author_client.get(
             PostViewsTests.INDEX_URL
         ).content
-        new_post.delete()
-        after_delete_post_content = PostViewsTests.author_client.get(
+        Post.objects.filter(pk=PostViewsTests.post.pk).update(
+            text='Изменено в обход сигналов'
+        )
+        after_update_content = PostViewsTests.author_client.get(
             PostViewsTests.INDEX_URL
         ).content
-        self.assertEqual(current_content, after_delete_post_content)
+        self.assertEqual(current_content, after_update_content)
         cache.clear()
         after_clear_cache_content = PostViewsTests.author_client.get(
             PostViewsTests.INDEX_URL
         ).content
         self.assertNotEqual(
-            current_content, after_clear_cache_content
+            after_update_content, after_clear_cache_content
         )
 
+    def test_post_card_cache(self):
+        """Проверяем, что карточка записи берётся из кеша, пока запись
+        не изменена, и обновляется после сохранения."""
+        cache.clear()
+        PostViewsTests.author_client.get(PostViewsTests.PROFILE_URL)
+        Post.objects.filter(pk=PostViewsTests.post.pk).update(
+            text='Изменено в обход сигналов'
+        )
+        response = PostViewsTests.author_client.get(PostViewsTests.PROFILE_URL)
+        self.assertContains(response, PostViewsTests.post.text)
+        post = Post.objects.get(pk=PostViewsTests.post.pk)
+        post.text = 'Отредактированная запись'
+        post.save()
+        response = PostViewsTests.author_client.get(PostViewsTests.PROFILE_URL)
+        self.assertContains(response, 'Отредактированная запись')
+
+    def test_thumbnail_generated_ahead_of_time(self):
+        """Проверяем, что миниатюра создаётся заранее, её адрес
+        выводится в карточке и сбрасывается при замене изображения."""
+        post = PostViewsTests.post
+        lists = (PostViewsTests.GROUP_LIST_URL, PostViewsTests.PROFILE_URL)
+        etags = {
+            list_url: self.client.get(list_url)['ETag'] for list_url in lists
+        }
+        with commit_callbacks():
+            url = thumbnails.generate(post.pk)
+        self.assertTrue(url)
+        for list_url, etag in etags.items():
+            with self.subTest(url=list_url):
+                response = self.client.get(
+                    list_url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertContains(response, url)
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.thumbnail, url)
+        response = PostViewsTests.author_client.get(
+            PostViewsTests.POST_DETAIL_URL
+        )
+        self.assertContains(response, url)
+        post.image = SimpleUploadedFile(
+            name='other.gif',
+            content=PostViewsTests.small_gif,
+            content_type='image/gif'
+        )
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).thumbnail, '')
+
+    def test_index_cache_invalidated_by_signals(self):
+        """Проверяем, что создание и удаление записи сразу
+        отражается на главной странице."""
+        PostViewsTests.author_client.get(PostViewsTests.INDEX_URL)
+        with commit_callbacks():
+            new_post = Post.objects.create(
+                text='Запись проверки кэша',
+                author=PostViewsTests.author,
+                group=PostViewsTests.group
+            )
+        response = PostViewsTests.author_client.get(PostViewsTests.INDEX_URL)
+        self.assertContains(response, new_post.text)
+        with commit_callbacks():
+            new_post.delete()
+        response = PostViewsTests.author_client.get(PostViewsTests.INDEX_URL)
+        self.assertNotContains(response, new_post.text)
+
 
 class PostPaginatorTests(TestCase):
     @classmethod
@@ -290,6 +361,61 @@ class PostPaginatorTests(TestCase):
                     PostPaginatorTests.ADDPOSTS
                 )
 
+    def test_cursor_pages(self):
+        """Проверяем, что курсоры ведут на следующую и предыдущую
+        страницы без пропусков и повторов."""
+        for url in [
+            PostPaginatorTests.INDEX_URL,
+            PostPaginatorTests.GROUP_LIST_URL,
+            PostPaginatorTests.PROFILE_URL
+        ]:
+            with self.subTest(url=url):
+                cache.clear()
+                first_page = PostPaginatorTests.author_client.get(
+                    url
+                ).context['page_obj']
+                self.assertIsNone(first_page.previous_cursor)
+                second_page = PostPaginatorTests.author_client.get(
+                    url, {'cursor': first_page.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    len(second_page), PostPaginatorTests.ADDPOSTS
+                )
+                self.assertIsNone(second_page.next_cursor)
+                self.assertEqual(
+                    len(set(first_page) | set(second_page)),
+                    settings.POSTS_PER_PAGE + PostPaginatorTests.ADDPOSTS
+                )
+                previous_page = PostPaginatorTests.author_client.get(
+                    url, {'cursor': second_page.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    previous_page.object_list, first_page.object_list
+                )
+                self.assertIsNone(previous_page.previous_cursor)
+
+    def test_index_cache_depends_on_page(self):
+        """Проверяем, что вторая страница главной не берётся
+        из кеша первой."""
+        first_page = PostPaginatorTests.author_client.get(
+            PostPaginatorTests.INDEX_URL
+        )
+        second_page = PostPaginatorTests.author_client.get(
+            PostPaginatorTests.INDEX_URL,
+            {'cursor': first_page.context['page_obj'].next_cursor}
+        )
+        self.assertNotContains(second_page, self.posts[-1].text)
+        self.assertContains(second_page, self.posts[0].text)
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Проверяем, что некорректный курсор открывает первую страницу."""
+        response = PostPaginatorTests.author_client.get(
+            PostPaginatorTests.PROFILE_URL, {'cursor': 'broken'}
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), settings.POSTS_PER_PAGE
+        )
+
 
 class FollowViewsTests(TestCase):
     @classmethod
@@ -398,3 +524,704 @@ class FollowViewsTests(TestCase):
         )
         self.assertEqual(len(response.context['page_obj']), 0)
         self.assertNotContains(response, FollowViewsTests.post)
+
+    def followed_by(self, response):
+        """Отрисовывает фильтр followed_by для автора профиля."""
+        return Template(
+            '{% load following %}{{ author|followed_by:request }}'
+        ).render(Context({
+            'author': response.context['author'],
+            'request': response.wsgi_request,
+        }))
+
+    def test_follow_state_is_cached(self):
+        """Проверяем, что подписка на профиле берётся из кеша
+        и обновляется после подписки и отписки."""
+        cache.clear()
+        url = FollowViewsTests.PROFILE_URL
+        self.assertFalse(
+            self.authorized_client.get(url).context['following']
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        self.assertFalse(any(
+            Follow._meta.db_table in query['sql']
+            for query in queries.captured_queries
+        ))
+        with commit_callbacks():
+            self.authorized_client.get(FollowViewsTests.PROFILE_FOLLOW_URL)
+        response = self.authorized_client.get(url)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(self.followed_by(response), 'True')
+        self.assertContains(response, FollowViewsTests.PROFILE_UNFOLLOW_URL)
+        with commit_callbacks():
+            self.authorized_client.get(FollowViewsTests.PROFILE_UNFOLLOW_URL)
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['following'])
+        self.assertEqual(self.followed_by(response), 'False')
+        self.assertContains(response, FollowViewsTests.PROFILE_FOLLOW_URL)
+
+    def test_follow_fills_and_prunes_feed(self):
+        """Проверяем, что подписка заполняет ленту записями автора,
+        новая запись разносится подписчикам после фиксации транзакции,
+        а отписка очищает ленту."""
+        Follow.objects.create(
+            user=self.user,
+            author=FollowViewsTests.author
+        )
+        new_post = Post.objects.create(
+            author=FollowViewsTests.author,
+            text='Новая запись'
+        )
+        self.assertFalse(self.user.feed_items.filter(post=new_post).exists())
+        tasks.fan_out_post(new_post.pk)
+        self.assertEqual(
+            list(self.user.feed_items.values_list('post', flat=True)),
+            [new_post.pk, FollowViewsTests.post.pk]
+        )
+        self.authorized_client.post(FollowViewsTests.PROFILE_UNFOLLOW_URL)
+        self.assertFalse(self.user.feed_items.exists())
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_pulled_author_posts_in_feed(self):
+        """Проверяем, что записи авторов без разноса попадают в ленту
+        при чтении."""
+        Follow.objects.create(
+            user=self.user,
+            author=FollowViewsTests.author
+        )
+        new_post = Post.objects.create(
+            author=FollowViewsTests.author,
+            text='Запись популярного автора'
+        )
+        tasks.fan_out_post(new_post.pk)
+        self.assertTrue(PulledAuthor.objects.filter(
+            author=FollowViewsTests.author
+        ).exists())
+        self.assertFalse(FeedItem.objects.filter(post=new_post).exists())
+        response = self.authorized_client.get(FollowViewsTests.FOLLOW_URL)
+        self.assertEqual(
+            response.context['page_obj'].object_list,
+            [new_post, FollowViewsTests.post]
+        )
+
+    def test_rebuild_skips_popular_authors(self):
+        """Проверяем, что перестроение лент помечает популярных авторов
+        и не копирует их записи в ленты."""
+        Follow.objects.create(
+            user=self.user,
+            author=FollowViewsTests.author
+        )
+        with override_settings(FEED_FANOUT_LIMIT=0):
+            feed.rebuild()
+        self.assertTrue(PulledAuthor.objects.filter(
+            author=FollowViewsTests.author
+        ).exists())
+        self.assertFalse(self.user.feed_items.exists())
+
+    @override_settings(FEED_BACKFILL_LIMIT=1)
+    def test_backfill_is_limited_to_recent_posts(self):
+        """Проверяем, что подписка добавляет в ленту только последние
+        записи автора."""
+        new_post = Post.objects.create(
+            author=FollowViewsTests.author,
+            text='Новая запись'
+        )
+        Follow.objects.create(
+            user=self.user,
+            author=FollowViewsTests.author
+        )
+        self.assertEqual(
+            list(self.user.feed_items.values_list('post', flat=True)),
+            [new_post.pk]
+        )
+
+
+class SearchViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Запись про горные велосипеды'
+        )
+        cls.commented_post = Post.objects.create(
+            author=cls.author,
+            text='Запись без ключевых слов'
+        )
+        Comment.objects.create(
+            post=cls.commented_post,
+            author=cls.author,
+            text='Комментарий про велосипеды'
+        )
+        Post.objects.create(author=cls.author, text='Посторонняя запись')
+        cls.SEARCH_URL = reverse('posts:search')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query):
+        response = self.guest_client.get(
+            SearchViewsTests.SEARCH_URL, {'q': query}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.context['page_obj']
+
+    def test_search_finds_posts_by_post_and_comment_text(self):
+        """Проверяем, что поиск находит записи по тексту записи
+        и комментариев, начиная с более релевантных."""
+        page_obj = self.search('велосипед')
+        self.assertEqual(page_obj.paginator.count, 2)
+        self.assertEqual(
+            set(page_obj),
+            {SearchViewsTests.post, SearchViewsTests.commented_post}
+        )
+        self.assertEqual(
+            list(self.search('горные велосипеды')), [SearchViewsTests.post]
+        )
+
+    def test_search_follows_post_changes(self):
+        """Проверяем, что индекс обновляется при изменении
+        и удалении записей."""
+        post = Post.objects.create(author=SearchViewsTests.author, text='Лыжи')
+        self.assertEqual(list(self.search('лыжи')), [post])
+        post.text = 'Коньки'
+        post.save()
+        self.assertEqual(len(self.search('лыжи')), 0)
+        post.delete()
+        self.assertEqual(len(self.search('коньки')), 0)
+
+    def test_search_ignores_query_syntax(self):
+        """Проверяем, что служебные символы в запросе не ломают поиск."""
+        self.assertEqual(len(self.search('"велосипед OR (')), 0)
+        self.assertEqual(len(self.search('')), 0)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Длинный тестовый пост',
+            group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': cls.author.username}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def revalidate(self, url):
+        """Запрашивает страницу повторно с полученным ETag."""
+        etag = self.guest_client.get(url)['ETag']
+        return self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_return_not_modified(self):
+        """Проверяем, что неизменившиеся страницы отдают 304."""
+        for url in ConditionalGetTests.urls:
+            with self.subTest(url=url):
+                response = self.revalidate(url)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_changed_pages_are_rendered(self):
+        """Проверяем, что после изменения записи страницы
+        отрисовываются заново."""
+        for url in ConditionalGetTests.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                post = Post.objects.get(pk=ConditionalGetTests.post.pk)
+                post.text = f'Изменённая запись {url}'
+                with commit_callbacks():
+                    post.save()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_comment_changes_post_etag(self):
+        """Проверяем, что правка и замена комментария меняют ETag
+        записи, хотя число комментариев остаётся прежним."""
+        url = ConditionalGetTests.urls[3]
+        comment = Comment.objects.create(
+            post=ConditionalGetTests.post,
+            author=ConditionalGetTests.author,
+            text='Комментарий'
+        )
+        etag = self.guest_client.get(url)['ETag']
+        comment.text = 'Исправленный комментарий'
+        with commit_callbacks():
+            comment.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        etag = response['ETag']
+        with commit_callbacks():
+            comment.delete()
+            Comment.objects.create(
+                post=ConditionalGetTests.post,
+                author=ConditionalGetTests.author,
+                text='Новый комментарий'
+            )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_versions_change_after_commit(self):
+        """Проверяем, что версия кеша меняется только после фиксации
+        транзакции, в которой изменилась запись."""
+        before = caching.version(caching.INDEX)
+        with commit_callbacks():
+            ConditionalGetTests.post.save()
+            self.assertEqual(caching.version(caching.INDEX), before)
+        self.assertNotEqual(caching.version(caching.INDEX), before)
+
+    def test_versions_are_renewed_after_replicas_catch_up(self):
+        """Проверяем, что при репликах версии кеша сбрасываются повторно
+        одной задачей на область и ETag, выданный до догона реплик,
+        устаревает."""
+        cache.clear()
+        url = ConditionalGetTests.urls[0]
+        replicas = override_settings(DATABASE_REPLICAS=['replica'])
+        with replicas, mock.patch.object(
+            tasks.renew_version, 'schedule'
+        ) as schedule:
+            for _ in range(2):
+                with commit_callbacks():
+                    ConditionalGetTests.post.save()
+        delays = {call.args[0] for call in schedule.call_args_list}
+        scopes = [call.args[1] for call in schedule.call_args_list]
+        self.assertEqual(delays, {caching.renewal_delay()})
+        self.assertEqual(len(scopes), len(set(scopes)))
+        self.assertIn(caching.INDEX, scopes)
+        etag = self.guest_client.get(url)['ETag']
+        with replicas, mock.patch.object(
+            tasks.renew_version, 'schedule'
+        ) as schedule:
+            for scope in scopes:
+                tasks.renew_version(scope)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertCountEqual(
+            [call.args[1] for call in schedule.call_args_list], scopes
+        )
+
+    def test_etag_depends_on_user(self):
+        """Проверяем, что ETag гостя не подходит
+        авторизованному пользователю."""
+        url = ConditionalGetTests.urls[0]
+        etag = self.guest_client.get(url)['ETag']
+        author_client = Client()
+        author_client.force_login(ConditionalGetTests.author)
+        response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class ExportViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='exporter')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.staff = User.objects.create_user(
+            username='staff', is_staff=True
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Выгружаемая запись', group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        cls.EXPORT_POSTS_URL = reverse(
+            'posts:export_author', args=(cls.author.username, 'posts')
+        )
+        cls.EXPORT_GROUP_COMMENTS_URL = reverse(
+            'posts:export_group', args=(cls.group.slug, 'comments')
+        )
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def test_author_exports_own_posts(self):
+        """Проверяем, что автор получает потоковую выгрузку записей."""
+        response = self.client_for(ExportViewsTests.author).get(
+            ExportViewsTests.EXPORT_POSTS_URL
+        )
+        self.assertTrue(response.streaming)
+        rows = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], ExportViewsTests.post.pk)
+        self.assertEqual(rows[0]['group'], ExportViewsTests.group.slug)
+
+    def test_group_export_csv(self):
+        """Проверяем выгрузку комментариев сообщества в CSV."""
+        response = self.client_for(ExportViewsTests.staff).get(
+            ExportViewsTests.EXPORT_GROUP_COMMENTS_URL, {'format': 'csv'}
+        )
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(
+            content.splitlines(),
+            [
+                'post,author,text,created',
+                f'{ExportViewsTests.post.pk},reader,Комментарий,'
+                f'{Comment.objects.get().created.isoformat()}',
+            ]
+        )
+
+    def test_export_permissions(self):
+        """Проверяем, что чужие выгрузки недоступны."""
+        reader = self.client_for(ExportViewsTests.reader)
+        for url in (
+            ExportViewsTests.EXPORT_POSTS_URL,
+            ExportViewsTests.EXPORT_GROUP_COMMENTS_URL,
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    reader.get(url).status_code, HTTPStatus.FORBIDDEN
+                )
+
+    def test_unknown_export(self):
+        """Проверяем, что неизвестная выгрузка отдаёт 404."""
+        staff = self.client_for(ExportViewsTests.staff)
+        for url in (
+            reverse('posts:export_author', args=('exporter', 'likes')),
+            reverse('posts:export_group', args=('test', 'follows')),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    staff.get(url).status_code, HTTPStatus.NOT_FOUND
+                )
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.post = Post.objects.create(author=cls.author, text='Запись')
+        cls.ADDCOMMENTS = 3
+        for number in range(settings.COMMENTS_PER_PAGE + cls.ADDCOMMENTS):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'Коммент {number}'
+            )
+        cls.POST_DETAIL_URL = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+        cls.POST_COMMENTS_URL = reverse(
+            'posts:post_comments', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_initial_render_is_capped(self):
+        """Проверяем, что запись показывает первую страницу комментариев
+        со ссылкой на следующую."""
+        response = self.guest_client.get(
+            CommentPaginationTests.POST_DETAIL_URL
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.COMMENTS_PER_PAGE)
+        last = settings.COMMENTS_PER_PAGE + CommentPaginationTests.ADDCOMMENTS
+        self.assertEqual(comments[0].text, f'Коммент {last - 1}')
+        self.assertContains(
+            response,
+            f'{CommentPaginationTests.POST_COMMENTS_URL}'
+            f'?cursor={comments.next_cursor}'
+        )
+
+    def test_fragment_loads_next_page(self):
+        """Проверяем, что фрагмент отдаёт следующую страницу без
+        обвязки страницы."""
+        first = self.guest_client.get(
+            CommentPaginationTests.POST_COMMENTS_URL
+        ).context['comments']
+        response = self.guest_client.get(
+            CommentPaginationTests.POST_COMMENTS_URL,
+            {'cursor': first.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comment_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(
+            len(response.context['comments']),
+            CommentPaginationTests.ADDCOMMENTS
+        )
+        self.assertNotContains(response, 'Показать ещё')
+
+    def test_fragment_of_unknown_post(self):
+        """Проверяем, что фрагмент несуществующей записи отдаёт 404."""
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+@override_settings(FOLLOWS_PER_PAGE=2)
+class FollowListTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testAuthor')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+        cls.FOLLOWERS_URL = reverse(
+            'posts:profile_followers', kwargs={'username': 'testAuthor'}
+        )
+        cls.FOLLOWING_URL = reverse(
+            'posts:profile_following', kwargs={'username': 'reader0'}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_followers_are_paged_by_key(self):
+        """Проверяем, что подписчики выводятся страницами по курсору."""
+        response = self.guest_client.get(FollowListTests.FOLLOWERS_URL)
+        self.assertEqual(
+            response.context['users'],
+            [FollowListTests.readers[2], FollowListTests.readers[1]]
+        )
+        response = self.guest_client.get(
+            FollowListTests.FOLLOWERS_URL,
+            {'cursor': response.context['page_obj'].next_cursor}
+        )
+        self.assertEqual(
+            response.context['users'], [FollowListTests.readers[0]]
+        )
+        self.assertIsNone(response.context['page_obj'].next_cursor)
+        self.assertIsNotNone(response.context['page_obj'].previous_cursor)
+
+    def test_following_list(self):
+        """Проверяем список авторов, на которых подписан пользователь."""
+        response = self.guest_client.get(FollowListTests.FOLLOWING_URL)
+        self.assertEqual(response.context['users'], [FollowListTests.author])
+        self.assertContains(response, 'testAuthor')
+
+    def test_profile_shows_counters(self):
+        """Проверяем, что профиль показывает счётчики подписок."""
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'testAuthor'})
+        )
+        self.assertContains(response, 'Подписчиков: 3')
+        self.assertContains(response, 'Подписок: 0')
+
+    def test_unknown_user(self):
+        """Проверяем, что список несуществующего пользователя отдаёт 404."""
+        response = self.guest_client.get(
+            reverse('posts:profile_followers', kwargs={'username': 'nobody'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class FollowBulkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(6)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, text=f'Запись {author}')
+        cls.FOLLOW_BULK_URL = reverse('posts:follow_bulk')
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def usernames(self, count):
+        return [author.username for author in FollowBulkTests.authors[:count]]
+
+    def test_follow_and_unfollow_many(self):
+        """Проверяем, что подписки меняются пачкой вместе с лентой,
+        счётчиками и кешем подписок."""
+        response = self.client.post(FollowBulkTests.FOLLOW_BULK_URL, {
+            'follow': self.usernames(3) + ['reader', 'nobody'],
+        })
+        self.assertEqual(response.json(), {
+            'followed': self.usernames(3), 'unfollowed': [],
+        })
+        self.assertEqual(self.user.follower.count(), 3)
+        self.assertEqual(self.user.feed_items.count(), 3)
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.following_count, 3)
+        self.assertEqual(
+            UserStats.objects.get(
+                user=FollowBulkTests.authors[0]
+            ).followers_count,
+            1
+        )
+        profile = reverse('posts:profile', args=('author0',))
+        self.assertTrue(self.client.get(profile).context['following'])
+
+        with commit_callbacks():
+            response = self.client.post(FollowBulkTests.FOLLOW_BULK_URL, {
+                'follow': self.usernames(1),
+                'unfollow': self.usernames(2),
+            })
+        self.assertEqual(response.json(), {
+            'followed': [], 'unfollowed': self.usernames(2),
+        })
+        self.assertEqual(self.user.follower.count(), 1)
+        self.assertEqual(self.user.feed_items.count(), 1)
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.following_count, 1)
+        self.assertFalse(self.client.get(profile).context['following'])
+
+    def test_counters_change_for_affected_rows_only(self):
+        """Проверяем, что счётчики меняются только для подписок,
+        которые пачка действительно создала или удалила."""
+        Follow.objects.create(
+            user=self.user, author=FollowBulkTests.authors[0]
+        )
+        response = self.client.post(FollowBulkTests.FOLLOW_BULK_URL, {
+            'follow': self.usernames(2),
+        })
+        self.assertEqual(response.json()['followed'], ['author1'])
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.following_count, 2)
+        Follow.objects.get(
+            user=self.user, author=FollowBulkTests.authors[1]
+        ).delete()
+        response = self.client.post(FollowBulkTests.FOLLOW_BULK_URL, {
+            'unfollow': self.usernames(2),
+        })
+        self.assertEqual(response.json()['unfollowed'], ['author0'])
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.following_count, 0)
+        self.assertEqual(
+            UserStats.objects.get(
+                user=FollowBulkTests.authors[1]
+            ).followers_count,
+            0
+        )
+
+    def test_queries_do_not_grow_with_batch(self):
+        """Проверяем, что число запросов не зависит от размера пачки."""
+        counts = []
+        for count in (2, 6):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(FollowBulkTests.FOLLOW_BULK_URL, {
+                    'follow': self.usernames(count),
+                })
+            with CaptureQueriesContext(connection) as unfollow_queries:
+                self.client.post(FollowBulkTests.FOLLOW_BULK_URL, {
+                    'unfollow': self.usernames(count),
+                })
+            counts.append((len(queries), len(unfollow_queries)))
+        self.assertEqual(counts[0], counts[1])
+
+    @override_settings(FOLLOW_BULK_LIMIT=2)
+    def test_batch_limit(self):
+        """Проверяем, что слишком большая пачка отклоняется."""
+        response = self.client.post(FollowBulkTests.FOLLOW_BULK_URL, {
+            'follow': self.usernames(3),
+        })
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertFalse(self.user.follower.exists())
+
+    def test_only_post_is_allowed(self):
+        """Проверяем, что эндпоинт принимает только POST."""
+        response = self.client.get(FollowBulkTests.FOLLOW_BULK_URL)
+        self.assertEqual(
+            response.status_code, HTTPStatus.METHOD_NOT_ALLOWED
+        )
+
+
+class SuggestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        (cls.reader, cls.other, cls.first, cls.second,
+         cls.friend, cls.cofollowed, cls.neighbour) = [
+            User.objects.create_user(username=name)
+            for name in ('reader', 'other', 'first', 'second',
+                         'friend', 'cofollowed', 'neighbour')
+        ]
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(author=cls.first, group=group, text='Запись')
+        Post.objects.create(author=cls.neighbour, group=group, text='Запись')
+        for user, author in (
+            (cls.reader, cls.first),
+            (cls.reader, cls.second),
+            (cls.first, cls.friend),
+            (cls.other, cls.first),
+            (cls.other, cls.second),
+            (cls.other, cls.cofollowed),
+        ):
+            Follow.objects.create(user=user, author=author)
+        cls.FOLLOW_URL = reverse('posts:follow_index')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(SuggestionTests.reader)
+
+    def test_rebuild_ranks_candidates(self):
+        """Проверяем, что рекомендации учитывают похожих читателей,
+        подписки авторов и сообщества и не включают подписки."""
+        suggestions.rebuild()
+        self.assertEqual(
+            list(SuggestionTests.reader.suggestions.values_list(
+                'author__username', flat=True
+            )),
+            ['cofollowed', 'friend', 'neighbour']
+        )
+        written = Suggestion.objects.count()
+        suggestions.rebuild()
+        self.assertEqual(Suggestion.objects.count(), written)
+
+    def test_follow_index_shows_suggestions(self):
+        """Проверяем, что страница подписок показывает рекомендации
+        и убирает автора после подписки на него."""
+        suggestions.rebuild()
+        response = self.client.get(SuggestionTests.FOLLOW_URL)
+        self.assertEqual(
+            response.context['suggested_authors'],
+            [
+                SuggestionTests.cofollowed,
+                SuggestionTests.friend,
+                SuggestionTests.neighbour,
+            ]
+        )
+        self.client.get(
+            reverse('posts:profile_follow', args=('cofollowed',))
+        )
+        self.assertFalse(SuggestionTests.reader.suggestions.filter(
+            author=SuggestionTests.cofollowed
+        ).exists())
+        response = self.client.get(SuggestionTests.FOLLOW_URL)
+        self.assertNotIn(
+            SuggestionTests.cofollowed, response.context['suggested_authors']
+        )
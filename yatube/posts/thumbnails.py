@@ -0,0 +1,38 @@
+"""Заблаговременное создание миниатюр изображений записей.
+
+Миниатюры создаются фоновой задачей после сохранения записи, а их
+адреса сохраняются в Post.thumbnail, поэтому шаблоны не обращаются
+к sorl.
+"""
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from . import caching
+from .models import Post
+
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+def generate(post_id):
+    """Создаёт миниатюру и сохраняет её адрес в записи.
+
+    Адрес сохраняется, только если изображение записи не успели
+    заменить. Возвращает адрес миниатюры или None, если файла нет.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author', 'group'
+    ).first()
+    if post is None or not post.image:
+        return None
+    if not post.image.storage.exists(post.image.name):
+        return None
+    url = get_thumbnail(post.image, GEOMETRY, **OPTIONS).url
+    if Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnail=url, updated=timezone.now()
+    ):
+        caching.bump(caching.INDEX)
+        caching.bump(caching.author_scope(post.author_id))
+        if post.group_id is not None:
+            caching.bump(caching.group_scope(post.group_id))
+    return url
@@ -1,14 +1,68 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('rss/', feeds.index_feed, {'feed_format': 'rss'}, name='index_rss'),
+    path(
+        'atom/', feeds.index_feed, {'feed_format': 'atom'}, name='index_atom'
+    ),
+    path(
+        'group/<slug:slug>/rss/',
+        feeds.group_feed,
+        {'feed_format': 'rss'},
+        name='group_rss'
+    ),
+    path(
+        'group/<slug:slug>/atom/',
+        feeds.group_feed,
+        {'feed_format': 'atom'},
+        name='group_atom'
+    ),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.author_feed,
+        {'feed_format': 'rss'},
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.author_feed,
+        {'feed_format': 'atom'},
+        name='profile_atom'
+    ),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/followers/',
+        views.profile_followers,
+        name='profile_followers'
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.profile_following,
+        name='profile_following'
+    ),
+    path(
+        'profile/<str:username>/export/<slug:kind>/',
+        views.export_author,
+        name='export_author'
+    ),
+    path(
+        'group/<slug:slug>/export/<slug:kind>/',
+        views.export_group,
+        name='export_group'
+    ),
+    path('search/', views.search, name='search'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -17,6 +71,7 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
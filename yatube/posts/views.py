@@ -1,32 +1,54 @@
+from http import HTTPStatus
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import etag, require_POST
 
+from . import caching, exporting, following, lookups, suggestions
+from .etags import group_etag, index_etag, post_etag, profile_etag
+from .feed import FeedPaginator
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
+from .paginators import CursorPaginator, KeyPaginator
+from .search import PostSearchResults
 
 
 def paginator(request, post_list):
-    """Паджинатор."""
-    paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    """Паджинатор.
+
+    По умолчанию страницы выбираются по курсору, постраничный режим
+    с номерами включается параметром ``page``.
+    """
+    if 'page' in request.GET:
+        paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
+        return paginator.get_page(request.GET.get('page'))
+    paginator = CursorPaginator(post_list, settings.POSTS_PER_PAGE)
+    return paginator.get_page(request.GET.get('cursor'))
 
 
+@etag(index_etag)
 def index(request):
     """Функция для отображения главной страницы проекта."""
     post_list = Post.objects.select_related('author', 'group')
 
     context = {
         'page_obj': paginator(request, post_list),
+        'cache_timeout': settings.INDEX_CACHE_TIMEOUT,
+        'cache_version': caching.version(caching.INDEX),
     }
     return render(request, 'posts/index.html', context)
 
 
+@etag(group_etag)
 def group_posts(request, slug):
     """Функция для отображения страницы сообщества."""
-    group = get_object_or_404(Group, slug=slug)
+    group = lookups.group(request, slug)
+    if group is None:
+        raise Http404
     post_list = group.posts.select_related('author')
 
     context = {
@@ -36,34 +58,120 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@etag(profile_etag)
 def profile(request, username):
     """Функция для отображения профиля пользователя."""
-    author = get_object_or_404(User, username=username)
+    author = lookups.author(request, username)
+    if author is None:
+        raise Http404
     post_list = author.posts.select_related('group')
-    following = request.user.is_authenticated and (
-        request.user.follower.filter(author=author).exists()
-    )
     context = {
         'author': author,
         'page_obj': paginator(request, post_list),
-        'following': following,
+        'following': author.pk in request.followed_ids,
     }
     return render(request, 'posts/profile.html', context)
 
 
+def follow_list(request, username, follows, related, title):
+    """Страница подписок автора: пользователи из поля related подписок.
+
+    Подписки идут по id пользователя из related, поэтому страница
+    выбирается по индексу подписок без OFFSET.
+    """
+    author = lookups.author(request, username)
+    if author is None:
+        raise Http404
+    page_obj = KeyPaginator(
+        follows(author).select_related(related),
+        settings.FOLLOWS_PER_PAGE,
+        f'{related}_id'
+    ).get_page(request.GET.get('cursor'))
+    context = {
+        'author': author,
+        'title': title,
+        'page_obj': page_obj,
+        'users': [getattr(follow, related) for follow in page_obj],
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+@etag(profile_etag)
+def profile_followers(request, username):
+    """Функция для отображения подписчиков автора."""
+    return follow_list(
+        request,
+        username,
+        lambda author: author.following,
+        'user',
+        'Подписчики'
+    )
+
+
+@etag(profile_etag)
+def profile_following(request, username):
+    """Функция для отображения авторов, на которых подписан пользователь."""
+    return follow_list(
+        request,
+        username,
+        lambda author: author.follower,
+        'author',
+        'Подписки'
+    )
+
+
+def search(request):
+    """Функция для поиска записей по тексту записей и комментариев."""
+    query = request.GET.get('q', '').strip()
+    results = PostSearchResults(
+        Post.objects.select_related('author', 'group'), query
+    )
+    context = {
+        'query': query,
+        'page_obj': Paginator(
+            results, settings.POSTS_PER_PAGE
+        ).get_page(request.GET.get('page')),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@etag(post_etag)
 def post_detail(request, post_id):
     """Функция для отображения конкретной записи."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = lookups.post(request, post_id)
+    if post is None:
+        raise Http404
     form = CommentForm()
-    comments = post.comments.all()
     context = {
         'post': post,
         'form': form,
-        'comments': comments
+        'comments': comments_page(request, post),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def comments_page(request, post):
+    """Страница комментариев к записи, новые первыми."""
+    return CursorPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_PER_PAGE,
+        field='created'
+    ).get_page(request.GET.get('cursor'))
+
+
+@etag(post_etag)
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев для «Показать ещё»."""
+    post = lookups.post(request, post_id)
+    if post is None:
+        raise Http404
+    context = {
+        'post': post,
+        'comments': comments_page(request, post),
+    }
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
 @login_required
 def post_create(request):
     """Функция для создания записи."""
@@ -114,9 +222,18 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    """Функция для отображения ленты подписок."""
+    if 'page' in request.GET:
+        page_obj = paginator(request, Post.objects.filter(
+            author__following__user=request.user
+        ).select_related('author', 'group'))
+    else:
+        page_obj = FeedPaginator(
+            request.user, settings.POSTS_PER_PAGE
+        ).get_page(request.GET.get('cursor'))
     context = {
-        'page_obj': paginator(request, post_list),
+        'page_obj': page_obj,
+        'suggested_authors': suggestions.for_request(request),
     }
     return render(request, 'posts/follow.html', context)
 
@@ -134,3 +251,65 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+@require_POST
+def follow_bulk(request):
+    """Подписка и отписка пачкой: username в полях follow и unfollow.
+
+    Отвечает JSON со списками followed и unfollowed — авторами,
+    подписка на которых действительно изменилась.
+    """
+    follow = request.POST.getlist('follow')
+    unfollow = request.POST.getlist('unfollow')
+    if len(follow) + len(unfollow) > settings.FOLLOW_BULK_LIMIT:
+        return JsonResponse(
+            {'error': f'Не больше {settings.FOLLOW_BULK_LIMIT} авторов'},
+            status=HTTPStatus.BAD_REQUEST
+        )
+    return JsonResponse({
+        'followed': following.follow_many(request.user, follow),
+        'unfollowed': following.unfollow_many(request.user, unfollow),
+    })
+
+
+def export_response(request, kind, name, **filters):
+    """Потоковый ответ с выгрузкой kind в формате из параметра format."""
+    file_format = request.GET.get('format', 'jsonl')
+    if kind not in exporting.EXPORTS or file_format not in exporting.FORMATS:
+        raise Http404
+    response = StreamingHttpResponse(
+        exporting.lines(kind, file_format, **filters),
+        content_type=exporting.FORMATS[file_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}-{kind}.{file_format}"'
+    )
+    return response
+
+
+@login_required
+def export_author(request, username, kind):
+    """Функция для выгрузки записей, комментариев и подписок автора.
+
+    Доступна самому автору и персоналу.
+    """
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    return export_response(request, kind, author.username, author=author)
+
+
+@login_required
+def export_group(request, slug, kind):
+    """Функция для выгрузки записей и комментариев сообщества.
+
+    Доступна персоналу.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    group = get_object_or_404(Group, slug=slug)
+    if exporting.GROUP_FILTERS.get(kind, '') is None:
+        raise Http404
+    return export_response(request, kind, group.slug, group=group)
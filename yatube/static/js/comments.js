@@ -0,0 +1,22 @@
+// Подгружает следующую страницу комментариев на место ссылки
+// «Показать ещё»; без JavaScript ссылка открывает страницу записи.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('[data-load-more]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.loadMore, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      link.outerHTML = html;
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
@@ -1,4 +1,8 @@
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -23,16 +27,20 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'posts.middleware.FollowedAuthorsMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -60,11 +68,73 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# Соединения живут DB_CONN_MAX_AGE секунд и переиспользуются между
+# запросами. При заданной POSTGRES_DB используется PostgreSQL с пулом
+# соединений (нужен psycopg2); соединение возвращается в пул в конце
+# каждого запроса, поэтому по умолчанию CONN_MAX_AGE для него 0.
+# Транзакции SQLite начинаются с BEGIN IMMEDIATE, чтобы параллельные
+# записи ждали друг друга, а не падали с «database is locked».
+if os.environ.get('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db.backends.postgresql_pool',
+            'NAME': os.environ['POSTGRES_DB'],
+            'USER': os.environ.get('POSTGRES_USER', ''),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', ''),
+            'PORT': os.environ.get('POSTGRES_PORT', ''),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+            'POOL': {
+                'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+                'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        }
+    }
+
+# Реплики для чтения: алиасы DATABASES, на которые ReplicaRouter
+# направляет чтение безопасных запросов. Для PostgreSQL задаются
+# хостами через запятую в POSTGRES_REPLICA_HOSTS.
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',')),
+    start=1
+):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+# После записи клиент столько секунд читает с основной базы.
+REPLICA_PIN_SECONDS = 10
+# Реплика, отставшая больше чем на столько секунд, пропускается. Через
+# REPLICA_MAX_LAG + REPLICA_LAG_CHECK_INTERVAL после сброса версии кеша
+# фоновая задача сбрасывает её повторно, одна на область
+# (posts.caching.bumped).
+REPLICA_MAX_LAG = 5
+REPLICA_LAG_CHECK_INTERVAL = 5
+
+# Проверка постоянных соединений в начале запроса, не чаще раза
+# в указанное число секунд.
+DB_HEALTH_CHECK_INTERVAL = 30
+
+# PRAGMA для каждого нового соединения SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -103,14 +173,133 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POSTS_PER_PAGE = 10
 
+COMMENTS_PER_PAGE = 20
+
+FOLLOWS_PER_PAGE = 50
+
+# Больше авторов за один запрос к posts:follow_bulk не принимается.
+FOLLOW_BULK_LIMIT = 100
+
+# Авторы с большим числом подписчиков не разносятся по лентам подписок,
+# их записи подмешиваются в ленту при чтении.
+FEED_FANOUT_LIMIT = 10000
+FEED_BATCH_SIZE = 1000
+# Запись разносится после фиксации транзакции: сразу, если подписчиков
+# не больше FEED_INLINE_FANOUT, иначе фоновой задачей.
+FEED_INLINE_FANOUT = 100
+# Новая подписка добавляет в ленту не больше стольких последних записей.
+FEED_BACKFILL_LIMIT = 200
+
+# Рекомендации авторов (manage.py build_suggestions): сколько хранится
+# для пользователя, сколько показывается на странице подписок, веса
+# сигналов и пачка пользователей на одну транзакцию пересчёта.
+SUGGESTIONS_PER_USER = 20
+SUGGESTIONS_SHOWN = 5
+SUGGESTIONS_BATCH_SIZE = 500
+SUGGESTION_WEIGHTS = {
+    'friends': 1.0,
+    'cofollow': 2.0,
+    'groups': 0.5,
+}
+SUGGESTION_COFOLLOW_LIMIT = 1000
+
+# Фрагмент главной страницы сбрасывается сигналами при изменении записей,
+# сообществ и пользователей, поэтому может жить долго.
+INDEX_CACHE_TIMEOUT = 60 * 60 * 3
+
+# Ключ карточки записи включает время её изменения, устаревшие карточки
+# просто перестают запрашиваться.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Множество подписок пользователя сбрасывается сигналами Follow.
+FOLLOWING_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Очередь фоновых задач (manage.py runworker). При TASKS_EAGER задачи
+# выполняются в процессе веб-сервера сразу после фиксации транзакции.
+TASKS_EAGER = False
+TASKS_MAX_ATTEMPTS = 3
+TASKS_RETRY_DELAY = 10
+TASKS_VISIBILITY_TIMEOUT = 5 * 60
+TASKS_CLAIM_BATCH = 10
+
+# RSS и Atom ленты: количество записей и время жизни готового XML,
+# который сбрасывается сигналами при сохранении записей.
+SYNDICATION_ITEMS = 20
+SYNDICATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Наибольший размер страницы JSON API (параметр limit).
+API_MAX_LIMIT = 100
+
+# Строк, читаемых из базы за раз при потоковой выгрузке.
+EXPORT_CHUNK_SIZE = 2000
+
+# Бюджеты SQL-запросов на одну страницу. Превышения и повторяющиеся
+# запросы (N+1) пишутся в лог, тесты проверяют бюджеты через
+# core.testing.QueryBudgetMixin.
+QUERY_BUDGET_ENABLED = DEBUG
+QUERY_REPEAT_THRESHOLD = 3
+QUERY_STATS_LOG_EVERY = 1000
+QUERY_BUDGETS = {
+    'posts:index': 6,
+    'posts:group_list': 5,
+    'posts:profile': 6,
+    'posts:post_detail': 5,
+    'posts:post_comments': 4,
+    'posts:profile_followers': 5,
+    'posts:profile_following': 5,
+    'posts:follow_index': 6,
+    'posts:search': 6,
+    'api:posts': 4,
+    'api:group_posts': 4,
+    'api:user_posts': 4,
+    'api:follow_posts': 5,
+    'api:post_detail': 4,
+    'api:comments': 4,
+}
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Файлы sitemap, которые пишет manage.py generate_sitemaps. Адреса
+# строятся от SITEMAP_BASE_URL.
+SITEMAP_ROOT = os.path.join(MEDIA_ROOT, 'sitemaps')
+SITEMAP_URL = MEDIA_URL + 'sitemaps/'
+SITEMAP_BASE_URL = 'http://localhost:8000'
+SITEMAP_SHARD_SIZE = 50000
+
+# Память процесса перед общим для всех процессов кешем. Файловый кеш
+# в CACHE_DIR заменяется Redis или Memcached без изменения 'default'.
+# Тесты (manage.py test и pytest) пишут в свой временный каталог на
+# каждый запуск: cache.clear() в них не стирает кеш сервера разработки,
+# а версии и подписки прошлых запусков не попадают в новый.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+if TESTING:
+    CACHE_DIR = tempfile.mkdtemp(prefix='yatube_test_cache_')
+    atexit.register(shutil.rmtree, CACHE_DIR, True)
+else:
+    CACHE_DIR = os.environ.get(
+        'CACHE_DIR', os.path.join(tempfile.gettempdir(), 'yatube_cache')
+    )
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', }}
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'LOCAL_TIMEOUT': 5,
+            'LOCAL_MAX_ENTRIES': 1000,
+            'SHARED_ONLY_PREFIXES': ['posts:version:', 'posts:following:'],
+            'LOCK_PREFIXES': ['template.cache.'],
+            'LOCK_TIMEOUT': 5,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
 
 INTERNAL_IPS = [
     '127.0.0.1',